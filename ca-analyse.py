@@ -1,8 +1,19 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import re
 import sys
-from typing import Any, Dict, List
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from ca_json import write_json_list
+
+# Below this many images the report is classified in-process.
+PARALLEL_MIN_IMAGES = 256
 
 
 def load_json(path: str) -> Any:
@@ -15,32 +26,194 @@ def load_json(path: str) -> Any:
 
 
 def normalize_subject(subject: str) -> str:
-    s = subject.strip()
-    if s.lower().startswith("subject="):
+    # Lowercase once; the prefix check works on the lowered copy rather than
+    # lowering the whole subject a second time just to test 8 characters.
+    s = subject.strip().lower()
+    if s.startswith("subject="):
         s = s[len("subject="):].lstrip()
-    return s.lower()
+    return s
+
+
+def lower_patterns(patterns: List[str]) -> List[str]:
+    """
+    Lowercase patterns once and drop redundant ones.
+
+    Only "does any pattern match" matters, so duplicates (e.g. "COMODO" and
+    "Comodo") and patterns containing a shorter pattern from the same list
+    can never change the result and are removed.
+    """
+    lowered: List[str] = []
+    for p in patterns:
+        if p and p.lower() not in lowered:
+            lowered.append(p.lower())
+
+    return [
+        p for p in lowered
+        if not any(q != p and q in p for q in lowered)
+    ]
+
+
+class PatternSet:
+    """
+    One policy list compiled for matching against normalized subjects:
+    a literal alternation regex, so the whole list is checked in a single
+    scan.
+    """
+
+    def __init__(self, lowered: List[str]) -> None:
+        self.regex = re.compile("|".join(re.escape(p) for p in lowered))
+        # pattern -> distinct subjects it classified (see --pattern-stats)
+        self.hits: Counter = Counter()
+
+
+def compile_patterns(
+    patterns: List[str],
+    hits: Optional[Counter] = None,
+) -> Optional[PatternSet]:
+    """
+    Returns None for an empty list (nothing can match).
+    With hit counts from earlier runs the most frequently matching patterns
+    are tried first by the alternation.
+    """
+    lowered = lower_patterns(patterns)
+    if not lowered:
+        return None
+    if hits:
+        lowered.sort(key=lambda p: -hits.get(p, 0))
+    return PatternSet(lowered)
+
+
+def load_pattern_stats(path: str) -> Counter:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return Counter(json.load(f))
+    except (OSError, ValueError):
+        return Counter()
+
+
+def save_pattern_stats(path: str, hits: Counter) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(hits.most_common()), f, indent=2)
 
 
-def classify_cert(
-    subject: str,
-    whitelist: List[str],
-    blacklist: List[str],
-) -> str:
+def classify_subjects(
+    subjects: List[str],
+    whitelist_pats: Optional[PatternSet],
+    blacklist_pats: Optional[PatternSet],
+) -> List[str]:
     """
-    Return exact labels: 'RED', 'GREEN', or 'YELLOW'
-    - blacklist wins over whitelist if both match
+    Label each subject 'RED', 'GREEN' or 'YELLOW'; the blacklist wins over
+    the whitelist if both match (patterns come from compile_patterns,
+    lowercased literals).
+
+    The normalized subjects are joined into one newline-separated buffer and
+    each list is scanned with a single finditer, so the per-subject loop
+    runs inside the regex engine.
+    Matches are mapped back to subjects through their start offsets
+    (patterns never contain a newline, so a match cannot span subjects).
     """
-    s = normalize_subject(subject)
+    norm = [normalize_subject(x).replace("\n", " ") for x in subjects]
+    buf = "\n".join(norm)
+
+    starts: List[int] = []
+    pos = 0
+    for x in norm:
+        starts.append(pos)
+        pos += len(x) + 1
+
+    labels = ["YELLOW"] * len(norm)
+    # blacklist first: a RED label is never overwritten by the whitelist
+    for pats, label in ((blacklist_pats, "RED"), (whitelist_pats, "GREEN")):
+        if pats is None:
+            continue
+        for m in pats.regex.finditer(buf):
+            i = bisect_right(starts, m.start()) - 1
+            if labels[i] == "YELLOW":
+                labels[i] = label
+                pats.hits[m.group()] += 1
+
+    return labels
 
-    for pat in blacklist:
-        if pat.lower() in s:
-            return "RED"
 
-    for pat in whitelist:
-        if pat.lower() in s:
-            return "GREEN"
+class Classifier:
+    """
+    Memoizing front-end to classify_subjects. The same CA subjects show up in
+    most images, so each distinct subject is classified once per run (per
+    worker process) and later lookups are a dict hit.
+    """
+
+    def __init__(
+        self,
+        whitelist_pats: Optional[PatternSet],
+        blacklist_pats: Optional[PatternSet],
+    ) -> None:
+        self.whitelist_pats = whitelist_pats
+        self.blacklist_pats = blacklist_pats
+        self.cache: Dict[str, str] = {}
 
-    return "YELLOW"
+    def classify(self, subjects: List[str]) -> List[str]:
+        cache = self.cache
+        misses = list(dict.fromkeys(s for s in subjects if s not in cache))
+        if misses:
+            labels = classify_subjects(misses, self.whitelist_pats, self.blacklist_pats)
+            cache.update(zip(misses, labels))
+        return [cache[s] for s in subjects]
+
+
+# Per-process classifier for pool workers, set by init_worker, so the cache
+# survives across tasks instead of being re-pickled with every chunk.
+_worker_classifier: Optional[Classifier] = None
+
+
+def init_worker(classifier: Classifier) -> None:
+    global _worker_classifier
+    _worker_classifier = classifier
+
+
+def process_entry_in_worker(entry: Dict[str, Any]) -> Dict[str, Any]:
+    assert _worker_classifier is not None
+    return process_entry(entry, _worker_classifier)
+
+
+def process_entry(
+    entry: Dict[str, Any],
+    classifier: Classifier,
+) -> Dict[str, Any]:
+    """
+    Classify all certs of one images.json entry and derive the image status.
+    """
+    image = entry.get("image")
+    namespaces = entry.get("namespaces", [])
+    certs_raw = entry.get("certs", [])
+
+    # Column-wise until output: one list per field instead of a dict per cert.
+    paths = [cert.get("path", "") for cert in certs_raw]
+    # interned: duplicates across images share one object in the report
+    subjects = [sys.intern(cert.get("subject", "")) for cert in certs_raw]
+    labels = classifier.classify(subjects)
+
+    # one C-level pass over the labels instead of two any() generators
+    present = set(labels)
+
+    if "RED" in present:
+        status = "RED"
+    elif "YELLOW" in present:
+        status = "YELLOW"
+    else:
+        # no certs OR all GREEN
+        status = "GREEN"
+
+    flat_certs = [
+        {"path": path, "subject": subj, "classification": cls}
+        for path, subj, cls in zip(paths, subjects, labels)
+    ]
+
+    return {
+        "image": image,
+        "namespaces": namespaces,
+        "status": status,
+        "certs": flat_certs,
+    }
 
 
 def main() -> None:
@@ -62,6 +235,25 @@ def main() -> None:
         default="-",
         help="Output file (default: stdout)",
     )
+    p.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the JSON output (default: compact)",
+    )
+    p.add_argument(
+        "--pattern-stats",
+        default=None,
+        help="JSON file of per-pattern hit counts; patterns are ordered by it "
+        "and it is updated after the run (not counted when the report is "
+        "classified by a worker pool, i.e. --workers > 1 and at least "
+        f"{PARALLEL_MIN_IMAGES} images)",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for classification (default: 1 = no pool)",
+    )
     args = p.parse_args()
 
     images_data = load_json(args.images)
@@ -70,53 +262,42 @@ def main() -> None:
     whitelist = policy.get("whitelist", [])
     blacklist = policy.get("blacklist", [])
 
-    report: List[Dict[str, Any]] = []
-
-    for entry in images_data:
-        image = entry.get("image")
-        namespaces = entry.get("namespaces", [])
-        certs_raw = entry.get("certs", [])
+    hits = load_pattern_stats(args.pattern_stats) if args.pattern_stats else Counter()
+    whitelist_pats = compile_patterns(whitelist, hits)
+    blacklist_pats = compile_patterns(blacklist, hits)
 
-        flat_certs: List[Dict[str, str]] = []
+    classifier = Classifier(whitelist_pats, blacklist_pats)
 
-        for cert in certs_raw:
-            subj = cert.get("subject", "")
-            cls = classify_cert(subj, whitelist, blacklist)
-            flat_certs.append(
-                {
-                    "path": cert.get("path", ""),
-                    "subject": subj,
-                    "classification": cls,
-                }
+    # Spawning workers costs more than classifying a small report serially.
+    used_pool = False
+    with ExitStack() as stack:
+        if args.workers > 1 and len(images_data) >= PARALLEL_MIN_IMAGES:
+            used_pool = True
+            ex = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=args.workers,
+                    initializer=init_worker,
+                    initargs=(classifier,),
+                )
             )
+            report = ex.map(process_entry_in_worker, images_data, chunksize=32)
+        else:
+            report = map(partial(process_entry, classifier=classifier), images_data)
 
-        has_red = any(c["classification"] == "RED" for c in flat_certs)
-        has_yellow = any(c["classification"] == "YELLOW" for c in flat_certs)
-
-        if has_red:
-            status = "RED"
-        elif flat_certs and has_yellow:
-            status = "YELLOW"
+        # entries are written as they are classified
+        if args.out == "-" or args.out == "/dev/stdout":
+            write_json_list(report, sys.stdout, args.pretty)
+            sys.stdout.write("\n")
         else:
-            # no certs OR all GREEN
-            status = "GREEN"
-
-        report.append(
-            {
-                "image": image,
-                "namespaces": namespaces,
-                "status": status,
-                "certs": flat_certs,
-            }
-        )
-
-    out_json = json.dumps(report, indent=2)
-
-    if args.out == "-" or args.out == "/dev/stdout":
-        print(out_json)
-    else:
-        with open(args.out, "w", encoding="utf-8") as f:
-            f.write(out_json)
+            with open(args.out, "w", encoding="utf-8") as f:
+                write_json_list(report, f, args.pretty)
+
+    # pool workers keep their own counters, so only in-process runs count
+    if args.pattern_stats and not used_pool:
+        for pats in (whitelist_pats, blacklist_pats):
+            if pats is not None:
+                hits.update(pats.hits)
+        save_pattern_stats(args.pattern_stats, hits)
 
 
 if __name__ == "__main__":
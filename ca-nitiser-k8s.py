@@ -2,22 +2,85 @@
 import argparse
 import hashlib
 import json
+import os
 import sys
+import tempfile
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
-from kubernetes import client, config
+from kubernetes import client, config, watch
 from kubernetes.client import CoreV1Api, BatchV1Api
 from kubernetes.client.exceptions import ApiException
 
+from ca_images import image_digest, pinned_ref
+from ca_json import json_loads, write_json_list
+
 SCAN_NAMESPACE_DEFAULT = "ca-scanner"
 SCANNER_IMAGE_DEFAULT = "harbor.andreybondarenko.com/library/ca-scanner-base:latest"
-
-
-def load_k8s() -> tuple[CoreV1Api, BatchV1Api]:
+WORKERS_DEFAULT = 16
+BATCH_SIZE_DEFAULT = 1
+LIST_PAGE_SIZE = 500
+# Finished scan Jobs are garbage-collected by the TTL controller after this
+# long, even if the run that created them died before its cleanup. It is
+# generous on purpose: a Job must outlive the wait for a free worker to
+# read its logs.
+JOB_TTL_SECONDS = 3600
+# A followed scan log that stays silent this long is given up, so a hung
+# scanner cannot hold a worker, and the run, forever.
+SCAN_TIMEOUT_SECONDS = 600
+# A scan pod is killed after running this long (the pod's
+# activeDeadlineSeconds). It counts from the pod's start, not the Job's
+# creation: every Job is submitted up front, and pods waiting for a node
+# must not use up their time. A batch pulls and unpacks its images in
+# parallel containers, so this bounds the slowest image of the batch.
+SCAN_DEADLINE_DEFAULT = 1800
+CACHE_DIR_DEFAULT = os.path.join(os.path.expanduser("~"), ".cache", "ca-nitiser")
+CACHE_TTL_DEFAULT = 24.0  # hours
+
+
+def load_k8s(workers: int = WORKERS_DEFAULT) -> tuple[CoreV1Api, BatchV1Api]:
     # In-cluster config
     config.load_incluster_config()
-    return client.CoreV1Api(), client.BatchV1Api()
+
+    # One ApiClient (one urllib3 pool) for both APIs. Each worker follows one
+    # log stream (or, if the shared watches break, one watch of its own) at a
+    # time, next to the two shared ScanEvents watches and the main thread's
+    # calls; size the pool for that so every log read after the first reuses
+    # a kept-alive connection instead of discarding it and re-handshaking.
+    configuration = client.Configuration.get_default_copy()
+    configuration.connection_pool_maxsize = max(
+        configuration.connection_pool_maxsize or 0, workers + 3
+    )
+    api = client.ApiClient(configuration)
+    # There is no field projection in the API, so the pod listing always
+    # carries every field; ask for it gzip-compressed (urllib3 inflates it).
+    api.set_default_header("Accept-Encoding", "gzip")
+    return client.CoreV1Api(api), client.BatchV1Api(api)
+
+
+def list_pods(core: CoreV1Api, scope_namespace: Optional[str]) -> Iterator[Dict[str, Any]]:
+    token = None
+    while True:
+        kwargs: Dict[str, Any] = {"limit": LIST_PAGE_SIZE, "_preload_content": False}
+        if token:
+            kwargs["_continue"] = token
+        if scope_namespace:
+            resp = core.list_namespaced_pod(scope_namespace, **kwargs)
+        else:
+            resp = core.list_pod_for_all_namespaces(**kwargs)
+        try:
+            page = json_loads(resp.data)
+        finally:
+            resp.release_conn()
+
+        yield from page.get("items") or []
+
+        token = (page.get("metadata") or {}).get("continue")
+        if not token:
+            return
 
 
 def get_images_and_namespaces(
@@ -25,39 +88,124 @@ def get_images_and_namespaces(
     scope_namespace: Optional[str],
 ) -> Dict[str, Any]:
     """
-    image -> { "namespaces": set([...]) }
-    """
-    if scope_namespace:
-        pods = core.list_namespaced_pod(scope_namespace)
-    else:
-        pods = core.list_pod_for_all_namespaces()
+    image -> { "namespaces": set([...]), "digest": "sha256:..." | None }
 
-    images: Dict[str, Any] = {}
+    The digest comes from the status imageID of a container running the image;
+    it stays None until some pod has actually pulled it.
 
-    for p in pods.items:
-        ns = p.metadata.namespace
-        spec = p.spec or {}
+    The listing is read raw (_preload_content=False) and parsed with json
+    into plain dicts: building V1Pod models for every field of every pod
+    costs far more than the handful of fields used here. It is fetched in
+    pages of LIST_PAGE_SIZE, so only one page is held at a time.
+    """
+    images: Dict[str, Any] = {}
 
-        def handle(cont_list):
-            for c in cont_list or []:
-                img = c.image
+    for p in list_pods(core, scope_namespace):
+        ns = p["metadata"]["namespace"]
+        spec = p.get("spec") or {}
+        status = p.get("status") or {}
+
+        image_ids: Dict[str, str] = {}
+        for key in (
+            "containerStatuses",
+            "initContainerStatuses",
+            "ephemeralContainerStatuses",
+        ):
+            for cs in status.get(key) or []:
+                if cs.get("imageID"):
+                    image_ids[cs["name"]] = cs["imageID"]
+
+        for key in ("containers", "initContainers", "ephemeralContainers"):
+            for c in spec.get(key) or []:
+                img = c.get("image")
                 if not img:
                     continue
-                images.setdefault(img, {"namespaces": set()})
-                images[img]["namespaces"].add(ns)
-
-        handle(spec.containers)
-        handle(spec.init_containers)
-        handle(getattr(spec, "ephemeral_containers", None))
+                info = images.setdefault(img, {"namespaces": set(), "digest": None})
+                info["namespaces"].add(ns)
+                if info["digest"] is None and c.get("name") in image_ids:
+                    info["digest"] = image_digest(image_ids[c["name"]])
 
     return images
 
 
+@lru_cache(maxsize=None)
+def scan_scripts_hash() -> Any:
+    h = hashlib.sha256()
+    h.update(build_scan_shell_script().encode("utf-8"))
+    h.update(PY_SCAN_SCRIPT.encode("utf-8"))
+    return h
+
+
+def cache_key(digest: str, scanner_image: str) -> str:
+    """
+    Cache entries are keyed by the image digest plus the scan scripts and
+    the scanner image, so a change to what is scanned (CA directories,
+    parsers) invalidates them. The scanner image is part of the key because
+    its tools decide the parser: with python3 + cryptography subjects are
+    rendered by PY_SCAN_SCRIPT, otherwise by openssl, and the two differ
+    for non-ASCII names. The scripts are hashed once; each key only adds
+    the rest to a copy.
+    """
+    h = scan_scripts_hash().copy()
+    h.update(scanner_image.encode("utf-8") + b"\0")
+    h.update(digest.encode("utf-8"))
+    return h.hexdigest()
+
+
+def cache_file(cache_dir: str, digest: str, scanner_image: str) -> str:
+    return os.path.join(cache_dir, cache_key(digest, scanner_image) + ".json")
+
+
+def load_cached_certs(
+    cache_dir: str,
+    digest: str,
+    scanner_image: str,
+    ttl_sec: float = 0,
+) -> Optional[List[Dict[str, str]]]:
+    """
+    Return the cached scan result for a digest, or None if there is none or
+    it is older than ttl_sec (0 = never expires).
+    """
+    path = cache_file(cache_dir, digest, scanner_image)
+    try:
+        if ttl_sec > 0 and time.time() - os.stat(path).st_mtime > ttl_sec:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_cached_certs(
+    cache_dir: str,
+    digest: str,
+    scanner_image: str,
+    certs: List[Dict[str, str]],
+) -> None:
+    """
+    Write the scan result for a digest atomically (tmp file + rename), so a
+    concurrent or interrupted run never sees a half-written entry.
+    """
+    path = cache_file(cache_dir, digest, scanner_image)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(certs, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        sys.stderr.write(f"[nitiser] cannot write cache {path}: {e}\n")
+
+
+@lru_cache(maxsize=None)
 def make_job_name(image: str) -> str:
-    h = hashlib.sha1(image.encode("utf-8")).hexdigest()[:10]
+    # Only a short unique suffix; BLAKE2b with a 5-byte digest gives the same
+    # 10 hex chars as the old truncated SHA-1 (name stays well under 63 chars).
+    h = hashlib.blake2b(image.encode("utf-8"), digest_size=5).hexdigest()
     return f"ca-scan-{h}"
 
 
+@lru_cache(maxsize=None)
 def build_scan_shell_script() -> str:
     return r"""
 set -e
@@ -69,19 +217,29 @@ ROOT_DIR="$WORK/root"
 
 mkdir -p "$OCI_DIR" "$ROOT_DIR"
 
+# Every failure exits non-zero, so the caller never mistakes an image that
+# was not scanned for one without CA certificates (and caches it as such).
+# Only "no CA directories in the image" is a successful empty scan.
 if ! command -v skopeo >/dev/null 2>&1; then
   echo "skopeo not found, no scan" >&2
-  exit 0
+  exit 1
 fi
 
 if ! command -v umoci >/dev/null 2>&1; then
   echo "umoci not found, no scan" >&2
-  exit 0
+  exit 1
 fi
 
-if ! command -v openssl >/dev/null 2>&1; then
+# Prefer the in-process parser (no fork per file) when the scanner image
+# ships python3 with cryptography; openssl is only needed otherwise.
+USE_PY=0
+if [ -n "${CA_SCAN_PY:-}" ] && command -v python3 >/dev/null 2>&1 \
+    && python3 -c "from cryptography import x509; x509.NameAttribute.rfc4514_attribute_name" \
+      >/dev/null 2>&1; then
+  USE_PY=1
+elif ! command -v openssl >/dev/null 2>&1; then
   echo "openssl not found, no scan" >&2
-  exit 0
+  exit 1
 fi
 
 echo "Pulling image: $IMAGE" >&2
@@ -90,118 +248,403 @@ skopeo copy \
   "docker://$IMAGE" \
   "oci:$OCI_DIR:scan" >/dev/null 2>&1 || {
     echo "skopeo copy failed for $IMAGE" >&2
-    exit 0
+    exit 1
   }
 
 echo "Unpacking image with umoci" >&2
 umoci unpack --rootless --image "$OCI_DIR:scan" "$ROOT_DIR" >/dev/null 2>&1 || {
   echo "umoci unpack failed for $IMAGE" >&2
-  exit 0
+  exit 1
 }
 
 ROOTFS="$ROOT_DIR/rootfs"
+CA_BASES="/etc/ssl/certs /etc/pki /usr/local/share/ca-certificates /usr/share/ca-certificates/mozilla"
+
+# Resolve a path inside the image the way the image itself would see it:
+# symlinks are followed one component at a time with ROOTFS as "/", so an
+# absolute link (openSUSE's /etc/ssl/certs -> /var/lib/ca-certificates/pem)
+# or a "../.." never leads into the scanner's own filesystem. Prints the
+# directory on the host, fails if it is none.
+resolve_in_rootfs() {
+  rest="$1"
+  done_path=""
+  hops=0
+  while [ -n "$rest" ]; do
+    comp="${rest%%/*}"
+    case "$rest" in */*) rest="${rest#*/}" ;; *) rest="" ;; esac
+    case "$comp" in
+      ""|.) continue ;;
+      ..) done_path="${done_path%/*}"; continue ;;
+    esac
+    if [ -L "$ROOTFS$done_path/$comp" ]; then
+      hops=$((hops + 1))
+      [ "$hops" -le 40 ] || return 1
+      target="$(readlink "$ROOTFS$done_path/$comp")" || return 1
+      case "$target" in /*) done_path="" ;; esac
+      rest="$target/$rest"
+    else
+      done_path="$done_path/$comp"
+    fi
+  done
+  [ -d "$ROOTFS$done_path" ] || return 1
+  printf '%s\n' "$ROOTFS$done_path"
+}
+
+# Resolve the bases inside the image and drop any that another base already
+# covers (e.g. /etc/ssl/certs -> ../pki/tls/certs next to /etc/pki), so each
+# directory is read once.
+ROOTFS="$(cd "$ROOTFS" && pwd -P)"
+SCAN_DIRS=""
+for base in $CA_BASES; do
+  dir="$(resolve_in_rootfs "$base")" || continue
+  case "$dir/" in "$ROOTFS"/*) ;; *) continue ;; esac
+  covered=0
+  kept=""
+  for seen in $SCAN_DIRS; do
+    case "$dir/" in "$seen"/*) covered=1 ;; esac
+    case "$seen/" in "$dir"/*) ;; *) kept="$kept $seen" ;; esac
+  done
+  [ "$covered" = 1 ] || SCAN_DIRS="$kept $dir"
+done
+
+# scratch/distroless images often have none of the CA directories: skip
+# all scanner setup for them
+if [ -z "$SCAN_DIRS" ]; then
+  echo "no CA directories in $IMAGE" >&2
+  exit 0
+fi
+
+SCAN_LIB="$WORK/scan_file.sh"
+PARTS_DIR="$WORK/parts"
+mkdir -p "$PARTS_DIR"
+
+# scan_file lives in its own file so xargs workers can source it.
+cat > "$SCAN_LIB" <<'SCAN_LIB_EOF'
+# Print "<path>\t<subject>" for every certificate in a PEM file.
+# The whole file goes through one crl2pkcs7|pkcs7 pipeline (two forks per
+# file instead of one openssl per certificate); files that pipeline rejects,
+# e.g. because one block is malformed, are split and parsed cert by cert.
+scan_file() {
+  f="$1"
+  rel="${f#$ROOTFS}"
+
+  subs="$(openssl crl2pkcs7 -nocrl -certfile "$f" 2>/dev/null \
+    | openssl pkcs7 -print_certs -noout 2>/dev/null)" && {
+    printf '%s\n' "$subs" | awk -v rel="$rel" '
+      /^subject=/ { printf "%s\t%s\n", rel, $0 }
+    '
+    return 0
+  }
+
+  # Temporary directory for split certs
+  tmpdir="$(mktemp -d /tmp/cacerts.XXXXXX 2>/dev/null || mktemp -d)"
+
+  # Split file into individual cert PEMs: tmpdir/cert-0001.pem, cert-0002.pem, ...
+  awk '
+    /-----BEGIN CERTIFICATE-----/ {
+      in_cert = 1
+      idx++
+      fn = sprintf("%s/cert-%04d.pem", d, idx)
+      print > fn
+      next
+    }
+    /-----END CERTIFICATE-----/ {
+      if (in_cert) {
+        print >> fn
+        close(fn)
+        in_cert = 0
+      }
+      next
+    }
+    {
+      if (in_cert) {
+        print >> fn
+      }
+    }
+  ' d="$tmpdir" "$f"
+
+  # Extract subject from every split cert
+  for pem in "$tmpdir"/cert-*.pem; do
+    [ -f "$pem" ] || continue
+    sub="$(openssl x509 -in "$pem" -noout -subject 2>/dev/null || true)"
+    if [ -n "$sub" ]; then
+      printf '%s\t%s\n' "$rel" "$sub"
+    fi
+  done
+
+  rm -rf "$tmpdir"
+}
+
+# Same output for a whole batch of files through a single crl2pkcs7|pkcs7
+# pipeline. Subjects come out in input order, so the per-file block counts
+# map them back to their files; if anything does not add up (a malformed
+# block, openssl skipping one...) each file is retried through scan_file.
+scan_files() {
+  [ $# -gt 1 ] || { scan_file "$1"; return 0; }
+  counts="$(grep -Hc -e '-----BEGIN CERTIFICATE-----' "$@" 2>/dev/null)" || true
+  for f; do set -- "$@" -certfile "$f"; shift; done
+
+  subs="$(openssl crl2pkcs7 -nocrl "$@" 2>/dev/null \
+    | openssl pkcs7 -print_certs -noout 2>/dev/null)" \
+  && { printf '%s\n\n' "$counts"; printf '%s\n' "$subs"; } | awk -v root="$ROOTFS" '
+    !sep && $0 == "" { sep = 1; next }
+    !sep {
+      n = $0; sub(/.*:/, "", n)
+      f = substr($0, length(root) + 1, length($0) - length(root) - length(n) - 1)
+      for (i = 0; i < n + 0; i++) owner[++total] = f
+      next
+    }
+    /^subject=/ { subj[++got] = $0 }
+    END {
+      if (got != total) exit 1
+      for (i = 1; i <= got; i++) printf "%s\t%s\n", owner[i], subj[i]
+    }
+  ' && return 0
+
+  for f; do
+    [ "$f" = -certfile ] || scan_file "$f"
+  done
+}
+SCAN_LIB_EOF
+. "$SCAN_LIB"
+export ROOTFS SCAN_LIB PARTS_DIR
+
+PARALLEL="${SCAN_PARALLEL:-$(nproc 2>/dev/null || echo 1)}"
+
+# grep -Z / xargs -0 -P are GNU/busybox extensions; without them fall back
+# to the serial loop.
+if printf 'x\n' | grep -lZ x >/dev/null 2>&1 \
+    && printf 'x' | xargs -0 -r -P 1 true >/dev/null 2>&1; then
+  XARGS_OK=1
+else
+  XARGS_OK=0
+fi
 
 scan_path() {
-  base="$1"
-  if [ -d "$ROOTFS$base" ]; then
-    find "$ROOTFS$base" -type f 2>/dev/null | while read f; do
-      # Skip files that clearly have no PEM certificates
-      grep -q "BEGIN CERTIFICATE" "$f" 2>/dev/null || continue
-
-      # Temporary directory for split certs
-      tmpdir="$(mktemp -d /tmp/cacerts.XXXXXX 2>/dev/null || mktemp -d)"
-
-      # Split file into individual cert PEMs: tmpdir/cert-0001.pem, cert-0002.pem, ...
-      awk '
-        /-----BEGIN CERTIFICATE-----/ {
-          in_cert = 1
-          idx++
-          fn = sprintf("%s/cert-%04d.pem", d, idx)
-          print > fn
-          next
-        }
-        /-----END CERTIFICATE-----/ {
-          if (in_cert) {
-            print >> fn
-            close(fn)
-            in_cert = 0
-          }
-          next
-        }
-        {
-          if (in_cert) {
-            print >> fn
-          }
-        }
-      ' d="$tmpdir" "$f"
-
-      # Extract subject from every split cert
-      for pem in "$tmpdir"/cert-*.pem; do
-        [ -f "$pem" ] || continue
-        sub="$(openssl x509 -in "$pem" -noout -subject 2>/dev/null || true)"
-        if [ -n "$sub" ]; then
-          rel="${f#$ROOTFS}"
-          printf '%s\t%s\n' "$rel" "$sub"
-        fi
-      done
-
-      rm -rf "$tmpdir"
-    done
+  dir="$1"
+
+  if [ "$XARGS_OK" = 1 ]; then
+    # Only files that contain a PEM block reach openssl; batches of 32 files
+    # share one openssl pipeline and run on all CPUs, each writing its own
+    # part file so lines never interleave.
+    grep -rlZ -e "BEGIN CERTIFICATE" "$dir" 2>/dev/null \
+      | xargs -0 -r -n 32 -P "$PARALLEL" sh -c '
+          . "$SCAN_LIB"
+          out="$(mktemp "$PARTS_DIR/part.XXXXXX")"
+          scan_files "$@" > "$out"
+        ' sh
+    return
   fi
+
+  find "$dir" -type f 2>/dev/null | while read f; do
+    # Skip files that clearly have no PEM certificates
+    grep -q "BEGIN CERTIFICATE" "$f" 2>/dev/null || continue
+    scan_file "$f"
+  done
 }
 
 
-for base in /etc/ssl/certs /etc/pki /usr/local/share/ca-certificates /usr/share/ca-certificates/mozilla; do
-  scan_path "$base"
+# Both parsers get the resolved directories: walking the raw bases would
+# follow an absolute symlink (e.g. openSUSE's /etc/ssl/certs ->
+# /var/lib/ca-certificates/pem) out into the scanner's own filesystem.
+if [ "$USE_PY" = 1 ]; then
+  python3 -c "$CA_SCAN_PY" "$ROOTFS" $SCAN_DIRS || {
+    echo "cert parser failed for $IMAGE" >&2
+    exit 1
+  }
+  exit 0
+fi
+
+for dir in $SCAN_DIRS; do
+  scan_path "$dir" || {
+    echo "cert scan of $dir failed for $IMAGE" >&2
+    exit 1
+  }
 done
+
+cat "$PARTS_DIR"/part.* 2>/dev/null || true
 """
 
 
+# Run inside the scanner Job as `python3 -c "$CA_SCAN_PY" ROOTFS DIR...`,
+# with the CA directories already resolved inside ROOTFS by the shell.
+# Prints the same "<path>\t<subject=...>" lines as the openssl path, with
+# subjects rendered in openssl's default "C = US, O = ..." form (non-ASCII
+# stays readable UTF-8 instead of openssl's \XX escapes). Like the shell
+# path it only looks at PEM files.
+PY_SCAN_SCRIPT = r'''
+import os
+import re
+import stat
+import sys
+
+from cryptography import x509
+
+PEM_RE = re.compile(
+    rb"-----BEGIN CERTIFICATE-----.+?-----END CERTIFICATE-----", re.S
+)
+# openssl names for attributes RFC 4514 only knows by dotted OID
+SHORT = {
+    "1.2.840.113549.1.9.1": "emailAddress",
+    "2.5.4.5": "serialNumber",
+    "2.5.4.97": "organizationIdentifier",
+}
+SPECIAL = set(',+;<>"\\')
+
+
+def value(v):
+    # openssl quotes the whole value when it holds separator characters
+    return '"%s"' % v if SPECIAL & set(v) else v
+
+
+def fmt(name):
+    parts = []
+    for rdn in name.rdns:
+        parts.append(" + ".join(
+            "%s = %s" % (SHORT.get(a.oid.dotted_string) or a.rfc4514_attribute_name, value(a.value))
+            for a in rdn
+        ))
+    return "subject=" + ", ".join(parts)
+
+
+def certs_in(data):
+    try:
+        return x509.load_pem_x509_certificates(data)
+    except Exception:
+        pass
+    out = []
+    for block in PEM_RE.findall(data):
+        try:
+            out.append(x509.load_pem_x509_certificate(block))
+        except Exception:
+            continue
+    return out
+
+
+rootfs = os.path.realpath(sys.argv[1])
+w = sys.stdout.write
+seen = set()
+for top in sys.argv[2:]:
+    # never leave the unpacked image, whatever the caller passed
+    top = os.path.realpath(top)
+    if os.path.commonpath([rootfs, top]) != rootfs:
+        continue
+    for dirpath, _dirs, files in os.walk(top):
+        for fn in files:
+            full = os.path.join(dirpath, fn)
+            try:
+                st = os.lstat(full)
+            except OSError:
+                continue
+            # symlinks are skipped, and a file reachable from two bases
+            # (symlinked base dir, hardlink) is only read once
+            if not stat.S_ISREG(st.st_mode) or (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            try:
+                with open(full, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            if b"BEGIN CERTIFICATE" not in data:
+                continue
+            rel = full[len(rootfs):]
+            for cert in certs_in(data):
+                w("%s\t%s\n" % (rel, fmt(cert.subject)))
+'''
+
+
+def scan_container_name(index: int) -> str:
+    return f"scan-{index}"
+
+
 def create_scan_job(
     batch: BatchV1Api,
     scan_ns: str,
-    image: str,
+    images: List[str],
     scanner_image: str,
+    scan_cpu: Optional[int] = None,
+    run_id: Optional[str] = None,
+    ttl_seconds: Optional[int] = JOB_TTL_SECONDS,
+    deadline_seconds: Optional[int] = SCAN_DEADLINE_DEFAULT,
 ) -> str:
+    """
+    One Job scans all of `images`: its pod gets one scan container per image
+    (scan-0, scan-1, ...), so each image has its own log and exit code while
+    the Job, pod and scheduling cost is paid once for the batch.
+
+    The manifest is a plain dict (sent as-is) rather than V1Job models the
+    client would have to walk and serialize; the scan script is built once
+    per run.
+    """
     from kubernetes.client.exceptions import ApiException
 
-    name = make_job_name(image)
+    # The run id is part of the name, so runs that overlap never share a
+    # Job: one run's cleanup would delete Jobs the other still waits on.
+    name = make_job_name("\n".join(([run_id] if run_id else []) + images))
     shell_script = build_scan_shell_script()
 
-    # Single container, no volumes needed
-    scan_container = client.V1Container(
-        name="scan",
-        image=scanner_image,
-        command=["/bin/sh", "-c", shell_script],
-        env=[client.V1EnvVar(name="TARGET_IMAGE", value=image)],
-    )
-
-    pod_spec = client.V1PodSpec(
-        restart_policy="Never",
-        containers=[scan_container],
-    )
+    common_env = [{"name": "CA_SCAN_PY", "value": PY_SCAN_SCRIPT}]
+    resources = None
+    if scan_cpu:
+        # nproc ignores the CFS quota, so tell the script how wide to go
+        common_env.append({"name": "SCAN_PARALLEL", "value": str(scan_cpu)})
+        resources = {
+            "requests": {"cpu": str(scan_cpu)},
+            "limits": {"cpu": str(scan_cpu)},
+        }
 
-    job = client.V1Job(
-        api_version="batch/v1",
-        kind="Job",
-        metadata=client.V1ObjectMeta(
-            name=name,
-            namespace=scan_ns,
-            labels={"app": "ca-scan"},
-        ),
-        spec=client.V1JobSpec(
-            backoff_limit=0,
-            template=client.V1PodTemplateSpec(
-                metadata=client.V1ObjectMeta(
-                    labels={"job-name": name, "app": "ca-scan"},
-                ),
-                spec=pod_spec,
-            ),
-        ),
-    )
+    containers = []
+    for i, image in enumerate(images):
+        # no volumes needed, each container unpacks into its own filesystem
+        container: Dict[str, Any] = {
+            "name": scan_container_name(i),
+            "image": scanner_image,
+            "command": ["/bin/sh", "-c", shell_script],
+            "env": [{"name": "TARGET_IMAGE", "value": image}] + common_env,
+        }
+        if resources:
+            container["resources"] = resources
+        containers.append(container)
+
+    labels = {"app": "ca-scan"}
+    if run_id:
+        # lets the run delete everything it created with one call
+        labels["ca-scan-run"] = run_id
+
+    job = {
+        "apiVersion": "batch/v1",
+        "kind": "Job",
+        "metadata": {
+            "name": name,
+            "namespace": scan_ns,
+            "labels": labels,
+        },
+        "spec": {
+            "backoffLimit": 0,
+            "template": {
+                "metadata": {
+                    "labels": {"job-name": name, "app": "ca-scan"},
+                },
+                "spec": {
+                    "restartPolicy": "Never",
+                    "containers": containers,
+                },
+            },
+        },
+    }
+
+    if ttl_seconds is not None:
+        job["spec"]["ttlSecondsAfterFinished"] = ttl_seconds
+    if deadline_seconds:
+        job["spec"]["template"]["spec"]["activeDeadlineSeconds"] = deadline_seconds
 
     try:
-        batch.create_namespaced_job(namespace=scan_ns, body=job)
+        # the response echoes the whole Job (scripts included); it is not
+        # needed, so skip deserializing it into a V1Job
+        batch.create_namespaced_job(
+            namespace=scan_ns, body=job, _preload_content=False
+        ).release_conn()
     except ApiException as e:
         if e.status == 409:
             sys.stderr.write(
@@ -214,6 +657,19 @@ def create_scan_job(
 
 
 
+def job_phase(job) -> Optional[str]:
+    """
+    Return "Complete" or "Failed" once the Job has finished, None while running.
+    """
+    status = job.status
+    conds = {c.type: c.status for c in ((status and status.conditions) or [])}
+    if conds.get("Complete") == "True":
+        return "Complete"
+    if conds.get("Failed") == "True":
+        return "Failed"
+    return None
+
+
 def wait_for_job(
     batch: BatchV1Api,
     scan_ns: str,
@@ -222,89 +678,371 @@ def wait_for_job(
 ) -> str:
     """
     Return "Complete", "Failed", "Timeout".
+
+    Blocks on a watch of the single Job so completion is seen as soon as the
+    API server reports it. The API server may close a watch before
+    timeout_seconds; it is then resumed from the last resourceVersion seen
+    rather than falling back to polling. Polling is only used if the watch
+    itself errors out.
     """
     start = time.time()
+    resource_version: Optional[str] = None
+
+    w = watch.Watch()
+    try:
+        while True:
+            remaining = int(timeout_sec - (time.time() - start))
+            if remaining <= 0:
+                return "Timeout"
+            kwargs: Dict[str, Any] = {}
+            if resource_version:
+                kwargs["resource_version"] = resource_version
+            try:
+                for event in w.stream(
+                    batch.list_namespaced_job,
+                    namespace=scan_ns,
+                    field_selector=f"metadata.name={job_name}",
+                    timeout_seconds=remaining,
+                    **kwargs,
+                ):
+                    obj = event["object"]
+                    if event["type"] == "DELETED":
+                        return "Failed"
+                    resource_version = obj.metadata.resource_version
+                    phase = job_phase(obj)
+                    if phase:
+                        return phase
+            except ApiException as e:
+                # 410 Gone: resourceVersion too old, restart from a fresh list
+                if e.status != 410:
+                    raise
+                resource_version = None
+    except Exception as e:
+        sys.stderr.write(
+            f"[nitiser] watch on job {job_name} failed ({e}), polling instead\n"
+        )
+    finally:
+        w.stop()
+
     while True:
         if time.time() - start > timeout_sec:
             return "Timeout"
 
         job = batch.read_namespaced_job(name=job_name, namespace=scan_ns)
-        conds = {c.type: c.status for c in (job.status.conditions or [])}
-        if conds.get("Complete") == "True":
-            return "Complete"
-        if conds.get("Failed") == "True":
-            return "Failed"
+        phase = job_phase(job)
+        if phase:
+            return phase
 
         time.sleep(2)
 
 
-def get_job_pod_name(core: CoreV1Api, scan_ns: str, job_name: str) -> Optional[str]:
-    pods = core.list_namespaced_pod(
-        namespace=scan_ns,
-        label_selector=f"job-name={job_name}",
-    )
-    if not pods.items:
+class ScanWatcher:
+    """
+    One watch on every scan object of a kind in the namespace (label
+    app=ca-scan), demultiplexed to the threads waiting for individual Jobs,
+    instead of one watch per Job. `state(event)` maps an event to
+    (job name, value) once it is interesting; the first value per Job wins.
+    If the watch cannot be kept up, waiters use their own fallback.
+    """
+
+    def __init__(
+        self,
+        list_fn: Callable[..., Any],
+        scan_ns: str,
+        state: Callable[[Dict[str, Any]], Optional[Tuple[str, str]]],
+    ) -> None:
+        self.list_fn = list_fn
+        self.scan_ns = scan_ns
+        self.state = state
+        self.values: Dict[str, str] = {}
+        self.broken = False
+        self.stopped = False
+        self.cond = threading.Condition()
+        self.watch = watch.Watch()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        resource_version: Optional[str] = None
+        try:
+            while not self.stopped:
+                kwargs: Dict[str, Any] = {}
+                if resource_version:
+                    kwargs["resource_version"] = resource_version
+                try:
+                    for event in self.watch.stream(
+                        self.list_fn,
+                        namespace=self.scan_ns,
+                        label_selector="app=ca-scan",
+                        timeout_seconds=300,
+                        **kwargs,
+                    ):
+                        resource_version = event["object"].metadata.resource_version
+                        found = self.state(event)
+                        if found:
+                            with self.cond:
+                                self.values.setdefault(*found)
+                                self.cond.notify_all()
+                except ApiException as e:
+                    # 410 Gone: resourceVersion too old, restart from a fresh list
+                    if e.status != 410:
+                        raise
+                    resource_version = None
+        except Exception as e:
+            if not self.stopped:
+                sys.stderr.write(f"[nitiser] shared watch failed ({e}), watching per job instead\n")
+            with self.cond:
+                self.broken = True
+                self.cond.notify_all()
+
+    def wait(
+        self,
+        job_name: str,
+        timeout_sec: int,
+        fallback: Callable[[int], Optional[str]],
+    ) -> Optional[str]:
+        """
+        The value recorded for job_name, or None after timeout_sec. Once the
+        shared watch is broken, fallback(remaining seconds) answers instead.
+        """
+        start = time.time()
+        with self.cond:
+            self.cond.wait_for(
+                lambda: job_name in self.values or self.broken, timeout_sec
+            )
+            value = self.values.get(job_name)
+        if value:
+            return value
+        remaining = int(timeout_sec - (time.time() - start))
+        if self.broken and remaining > 0:
+            return fallback(remaining)
         return None
-    return pods.items[0].metadata.name
+
+    def stop(self) -> None:
+        self.stopped = True
+        self.watch.stop()
+
+
+def job_event_phase(event: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    job = event["object"]
+    phase = job_phase(job)
+    if not phase and event["type"] == "DELETED":
+        phase = "Failed"
+    # our own cleanup deletes finished Jobs later; the first phase sticks
+    return (job.metadata.name, phase) if phase else None
+
+
+def pod_event_started(event: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    pod = event["object"]
+    phase = pod.status and pod.status.phase
+    job_name = (pod.metadata.labels or {}).get("job-name")
+    if job_name and event["type"] != "DELETED" and phase and phase != "Pending":
+        return job_name, pod.metadata.name
+    return None
+
+
+class ScanEvents:
+    """
+    Shared watches on the scan Jobs and their pods for one run.
+    """
+
+    def __init__(self, core: CoreV1Api, batch: BatchV1Api, scan_ns: str) -> None:
+        self.core = core
+        self.batch = batch
+        self.scan_ns = scan_ns
+        self.jobs = ScanWatcher(batch.list_namespaced_job, scan_ns, job_event_phase)
+        self.pods = ScanWatcher(core.list_namespaced_pod, scan_ns, pod_event_started)
+
+    def job_phase(self, job_name: str, timeout_sec: int = 600) -> str:
+        """
+        Return "Complete", "Failed", "Timeout", like wait_for_job.
+        """
+        return self.jobs.wait(
+            job_name,
+            timeout_sec,
+            lambda left: wait_for_job(self.batch, self.scan_ns, job_name, left),
+        ) or "Timeout"
+
+    def pod_name(self, job_name: str, timeout_sec: int = 600) -> Optional[str]:
+        """
+        Like wait_for_job_pod.
+        """
+        return self.pods.wait(
+            job_name,
+            timeout_sec,
+            lambda left: wait_for_job_pod(self.core, self.scan_ns, job_name, left),
+        )
+
+    def stop(self) -> None:
+        self.jobs.stop()
+        self.pods.stop()
 
 
-def get_pod_logs(
+def wait_for_job_pod(
     core: CoreV1Api,
     scan_ns: str,
-    pod_name: str,
-    container: str = "dump",
-) -> str:
+    job_name: str,
+    timeout_sec: int = 600,
+) -> Optional[str]:
+    """
+    Return the name of the Job's pod once it has left Pending (so its logs
+    can be followed), or None if no such pod shows up within timeout_sec.
+    """
+    w = watch.Watch()
     try:
-        return core.read_namespaced_pod_log(
-            name=pod_name,
+        for event in w.stream(
+            core.list_namespaced_pod,
             namespace=scan_ns,
-            container=container,
-        ) or ""
-    except Exception:
-        return ""
+            label_selector=f"job-name={job_name}",
+            timeout_seconds=timeout_sec,
+        ):
+            pod = event["object"]
+            phase = pod.status and pod.status.phase
+            if event["type"] != "DELETED" and phase and phase != "Pending":
+                return pod.metadata.name
+    except Exception as e:
+        sys.stderr.write(f"[nitiser] watch on pods of job {job_name} failed: {e}\n")
+    finally:
+        w.stop()
+    return None
+
+
+def stream_pod_logs(
+    core: CoreV1Api,
+    scan_ns: str,
+    pod_name: str,
+    container: str = "dump",
+) -> Iterator[str]:
+    """
+    Follow the container's log and yield it line by line until the container
+    exits, so output is consumed while the scan is still running.
 
-def extract_certs_with_job(
+    Raises if the log cannot be opened or breaks off (including when no data
+    arrives for SCAN_TIMEOUT_SECONDS): what was yielded is then incomplete.
+    """
+    resp = core.read_namespaced_pod_log(
+        name=pod_name,
+        namespace=scan_ns,
+        container=container,
+        follow=True,
+        _preload_content=False,
+        # (connect, read): the read timeout applies to each wait for data
+        _request_timeout=(30, SCAN_TIMEOUT_SECONDS),
+    )
+
+    pending = b""
+    try:
+        for chunk in resp.stream(decode_content=True):
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.decode("utf-8", "replace")
+        if pending:
+            yield pending.decode("utf-8", "replace")
+    finally:
+        resp.release_conn()
+
+
+def container_exit_codes(core: CoreV1Api, scan_ns: str, pod_name: str) -> Dict[str, int]:
+    try:
+        pod = core.read_namespaced_pod(name=pod_name, namespace=scan_ns)
+    except ApiException:
+        return {}
+    codes: Dict[str, int] = {}
+    for cs in (pod.status and pod.status.container_statuses) or []:
+        terminated = cs.state and cs.state.terminated
+        if terminated:
+            codes[cs.name] = terminated.exit_code
+    return codes
+
+
+def collect_scan_job(
     core: CoreV1Api,
     batch: BatchV1Api,
     scan_ns: str,
-    image: str,
-    scanner_image: str,
-) -> List[Dict[str, str]]:
-    job_name = create_scan_job(batch, scan_ns, image, scanner_image)
+    images: List[str],
+    job_name: str,
+    events: Optional[ScanEvents] = None,
+) -> List[Optional[List[Dict[str, str]]]]:
+    """
+    Wait for a scan Job and parse its output, one entry per image (in order).
+    An entry is None if that image's scan did not complete (nothing usable
+    to cache).
 
-    phase = wait_for_job(batch, scan_ns, job_name)
-    pod_name = get_job_pod_name(core, scan_ns, job_name)
+    Each scan container's log is followed from the moment the pod starts, so
+    parsing overlaps with the scan instead of waiting for the Job to finish
+    and fetching everything afterwards.
+    """
+    if events:
+        pod_name = events.pod_name(job_name)
+    else:
+        pod_name = wait_for_job_pod(core, scan_ns, job_name)
 
     if not pod_name:
-        print(f"WARN: no pod for job {job_name} (image {image})", file=sys.stderr)
-        return []
-
-    # logs from the single 'scan' container
-    logs = get_pod_logs(core, scan_ns, pod_name, container="scan")
-
-    if phase != "Complete":
-        print(f"WARN: scan job for image {image} ended with phase {phase}", file=sys.stderr)
-        if logs:
-            for line in logs.splitlines()[:20]:
-                print(f"  [scan-log] {line}", file=sys.stderr)
-        return []
-
-    logs = logs.strip()
-    if not logs:
-        return []
-
-    certs: List[Dict[str, str]] = []
-    for line in logs.splitlines():
-        # skip progress lines like "Pulling image..."
-        if "\t" not in line:
+        print(f"WARN: no pod for job {job_name} (images {', '.join(images)})", file=sys.stderr)
+        return [None] * len(images)
+
+    certs_per_image: List[List[Dict[str, str]]] = []
+    heads: List[List[str]] = []
+    # images whose log could not be read in full: never reported as scanned
+    broken: Set[int] = set()
+    for i in range(len(images)):
+        certs: List[Dict[str, str]] = []
+        head: List[str] = []
+        try:
+            for line in stream_pod_logs(core, scan_ns, pod_name, container=scan_container_name(i)):
+                if len(head) < 20:
+                    head.append(line)
+                # skip progress lines like "Pulling image..."
+                if "\t" not in line:
+                    continue
+                path, subj = line.split("\t", 1)
+                path = path.strip()
+                subj = subj.strip()
+                if path and subj:
+                    certs.append({"path": path, "subject": subj})
+        except Exception as e:
+            print(f"WARN: log of image {images[i]} in {pod_name} unreadable: {e}", file=sys.stderr)
+            broken.add(i)
+        certs_per_image.append(certs)
+        heads.append(head)
+
+    # all containers have exited by now, so this is normally a single event
+    if events:
+        phase = events.job_phase(job_name)
+    else:
+        phase = wait_for_job(batch, scan_ns, job_name)
+    # a failed Job may still have some containers that scanned fine
+    codes = container_exit_codes(core, scan_ns, pod_name) if phase == "Failed" else {}
+    results: List[Optional[List[Dict[str, str]]]] = []
+    for i, image in enumerate(images):
+        if i in broken:
+            results.append(None)
             continue
-        path, subj = line.split("\t", 1)
-        path = path.strip()
-        subj = subj.strip()
-        if path and subj:
-            certs.append({"path": path, "subject": subj})
+        if phase == "Complete" or codes.get(scan_container_name(i)) == 0:
+            results.append(certs_per_image[i])
+            continue
+        print(f"WARN: scan job for image {image} ended with phase {phase}", file=sys.stderr)
+        for line in heads[i]:
+            print(f"  [scan-log] {line}", file=sys.stderr)
+        results.append(None)
+    return results
 
-    return certs
+
+def cleanup_run_jobs(batch: BatchV1Api, scan_ns: str, run_id: str) -> None:
+    """
+    Delete every Job (and, in the background, its pod) created by this run
+    with a single label-selector call.
+    """
+    try:
+        batch.delete_collection_namespaced_job(
+            namespace=scan_ns,
+            label_selector=f"app=ca-scan,ca-scan-run={run_id}",
+            propagation_policy="Background",
+            _preload_content=False,
+        ).release_conn()
+    except ApiException as e:
+        sys.stderr.write(f"[nitiser] cannot delete scan jobs of run {run_id}: {e}\n")
 
 
 def main() -> None:
@@ -326,41 +1064,173 @@ def main() -> None:
         default=SCANNER_IMAGE_DEFAULT,
         help=f"Image used as scanner (with skopeo+umoci+openssl). Default: {SCANNER_IMAGE_DEFAULT}",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS_DEFAULT,
+        help=f"Scan Jobs awaited concurrently (default: {WORKERS_DEFAULT})",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE_DEFAULT,
+        help=f"Images scanned by one Job, as parallel containers of its pod (default: {BATCH_SIZE_DEFAULT})",
+    )
+    parser.add_argument(
+        "--keep-jobs",
+        action="store_true",
+        help="Do not delete scan Jobs after collecting their output",
+    )
+    parser.add_argument(
+        "--scan-cpu",
+        type=int,
+        default=None,
+        help="CPU request/limit per scan Job; also the number of parallel cert parsers (default: unset, use nproc)",
+    )
+    parser.add_argument(
+        "--scan-deadline",
+        type=int,
+        default=SCAN_DEADLINE_DEFAULT,
+        help=f"Seconds a scan pod may run before it is killed, 0 = no limit (default: {SCAN_DEADLINE_DEFAULT})",
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the JSON output (default: compact)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR_DEFAULT,
+        help=f"Directory for per-digest scan results (default: {CACHE_DIR_DEFAULT})",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=CACHE_TTL_DEFAULT,
+        help=f"Hours a cached scan result stays valid, 0 = forever (default: {CACHE_TTL_DEFAULT:g})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the scan cache",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Rescan every image but still update the cache",
+    )
     args = parser.parse_args()
 
-    core, batch = load_k8s()
+    core, batch = load_k8s(max(1, args.workers))
     images_info = get_images_and_namespaces(core, args.namespace)
 
     # debug to stderr so you see what it found
     sys.stderr.write(f"[nitiser] found {len(images_info)} unique images\n")
 
-    result = []
-    for image, info in sorted(images_info.items(), key=lambda kv: kv[0]):
-        ns_set = info["namespaces"]
-        sys.stderr.write(f"[nitiser] scanning image: {image}\n")
-
-        certs = extract_certs_with_job(
-            core=core,
-            batch=batch,
-            scan_ns=args.scan_namespace,
-            image=image,
-            scanner_image=args.scanner_image,
+    ordered = sorted(images_info.items(), key=lambda kv: kv[0])
+    use_cache = not args.no_cache
+
+    # Only digest-resolved images are cached: a tag can move between runs.
+    certs_by_image: Dict[str, List[Dict[str, str]]] = {}
+    if use_cache and not args.refresh:
+        for image, info in ordered:
+            if info["digest"]:
+                cached = load_cached_certs(
+                    args.cache_dir,
+                    info["digest"],
+                    args.scanner_image,
+                    args.cache_ttl * 3600,
+                )
+                if cached is not None:
+                    sys.stderr.write(f"[nitiser] image {image}: cached\n")
+                    certs_by_image[image] = cached
+
+    # Tags resolving to the same digest ("nginx:latest",
+    # "docker.io/library/nginx:latest", ...) are one scan; the first ref
+    # (in sorted order) is the one scanned, its result is shared by all.
+    aliases: Dict[str, List[str]] = {}
+    for image, info in ordered:
+        if image not in certs_by_image:
+            aliases.setdefault(info["digest"] or image, []).append(image)
+    to_scan = [refs[0] for refs in aliases.values()]
+
+    size = max(1, args.batch_size)
+    batches = [to_scan[i:i + size] for i in range(0, len(to_scan), size)]
+
+    # Submit every Job first so the cluster runs them concurrently,
+    # then wait for them in parallel (waiting is pure API I/O).
+    # the pid alone is not unique across scanner pods (often pid 1)
+    run_id = f"{int(time.time())}-{os.getpid()}-{os.urandom(3).hex()}"
+    job_names: List[str] = []
+    for images in batches:
+        # With a digest the Job pulls repo@digest, the content the pods run
+        # and the result is cached under, even if the tag has moved since.
+        refs = []
+        for image in images:
+            digest = images_info[image]["digest"]
+            refs.append(pinned_ref(image, digest) if digest else image)
+            sys.stderr.write(f"[nitiser] scanning image: {refs[-1]}\n")
+        job_names.append(
+            create_scan_job(
+                batch=batch,
+                scan_ns=args.scan_namespace,
+                images=refs,
+                scanner_image=args.scanner_image,
+                scan_cpu=args.scan_cpu,
+                run_id=run_id,
+                ttl_seconds=None if args.keep_jobs else JOB_TTL_SECONDS,
+                deadline_seconds=args.scan_deadline,
+            )
         )
 
-        sys.stderr.write(
-            f"[nitiser] image {image}: {len(certs)} certs\n"
-        )
+    events = ScanEvents(core, batch, args.scan_namespace) if batches else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as ex:
+            futures = {
+                ex.submit(
+                    collect_scan_job,
+                    core,
+                    batch,
+                    args.scan_namespace,
+                    images,
+                    job_name,
+                    events,
+                ): images
+                for images, job_name in zip(batches, job_names)
+            }
+            for fut in as_completed(futures):
+                for image, certs in zip(futures[fut], fut.result()):
+                    digest = images_info[image]["digest"]
+                    if certs is not None and use_cache and digest:
+                        store_cached_certs(
+                            args.cache_dir, digest, args.scanner_image, certs
+                        )
+                    certs = certs or []
+                    sys.stderr.write(
+                        f"[nitiser] image {image}: {len(certs)} certs\n"
+                    )
+                    for alias in aliases[digest or image]:
+                        certs_by_image[alias] = certs
+    finally:
+        if events:
+            events.stop()
+        # one delete for all of this run's Jobs instead of one per Job
+        if batches and not args.keep_jobs:
+            cleanup_run_jobs(batch, args.scan_namespace, run_id)
 
+    result = []
+    for image, info in ordered:
         result.append(
             {
                 "image": image,
-                "namespaces": sorted(ns_set),
-                "certs": certs,
+                "namespaces": sorted(info["namespaces"]),
+                "certs": certs_by_image.get(image, []),
             }
         )
 
     # ✔ always print JSON to stdout
-    print(json.dumps(result, indent=2))
+    write_json_list(result, sys.stdout, args.pretty)
+    sys.stdout.write("\n")
 
 
 if __name__ == "__main__":
@@ -1,197 +1,672 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import hashlib
+import io
 import json
+import os
+import posixpath
+import re
 import subprocess
 import sys
-from typing import Dict, List, Set, Tuple, Optional
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, List, Set, Tuple, Optional
 from collections import defaultdict
 
+from ca_images import image_digest, pinned_ref
+from ca_json import json_loads, write_json_list
+
+try:
+    from cryptography import x509
+    # subjects are rendered from rfc4514_attribute_name (cryptography 35+);
+    # anything older is left to openssl
+    if not hasattr(x509.NameAttribute, "rfc4514_attribute_name"):
+        x509 = None
+except ImportError:     # certificates are then parsed by the host's openssl
+    x509 = None
+
+# The two parsers render some subjects (non-ASCII) differently, so cached
+# results are kept apart per parser.
+CERT_PARSER = "cryptography" if x509 is not None else "openssl"
+
+try:
+    from kubernetes import client as k8s_client, config as k8s_config
+except ImportError:     # pods are then listed with kubectl
+    k8s_client = k8s_config = None
+
 CONFIG = {
     "kubectl_cmd": ["kubectl"],
     "runtime_cmd": ["docker"],
+    "openssl_cmd": ["openssl"],
+    "concurrency": 8,
+    # extra attempts for a failed pull (registry hiccups under concurrency)
+    "pull_retries": 2,
+    # pods per list request; kubectl pages through the rest
+    "list_chunk_size": 500,
+    "cache_dir": os.path.join(os.path.expanduser("~"), ".cache", "ca-nitiser"),
+    "cache_ttl_hours": 24.0,
     "ca_paths": [
         "/etc/ssl/certs",
         "/etc/pki",
         "/usr/local/share/ca-certificates",
         "/usr/share/ca-certificates/mozilla",
     ],
+    # one pod per line: namespace, then "<container>=<image>" pairs from the
+    # spec and "<container>=<imageID>" pairs from the status (space separated)
+    "pods_jsonpath": (
+        '{range .items[*]}{.metadata.namespace}{"\\t"}'
+        '{range .spec.containers[*]}{.name}{"="}{.image}{" "}{end}'
+        '{range .spec.initContainers[*]}{.name}{"="}{.image}{" "}{end}'
+        '{range .spec.ephemeralContainers[*]}{.name}{"="}{.image}{" "}{end}'
+        '{"\\t"}'
+        '{range .status.containerStatuses[*]}{.name}{"="}{.imageID}{" "}{end}'
+        '{range .status.initContainerStatuses[*]}{.name}{"="}{.imageID}{" "}{end}'
+        '{range .status.ephemeralContainerStatuses[*]}{.name}{"="}{.imageID}{" "}{end}'
+        '{"\\n"}{end}'
+    ),
 }
 
 
-def run(cmd: List[str]) -> subprocess.CompletedProcess:
-    return subprocess.run(
-        cmd,
+async def run(
+    cmd: List[str],
+    timeout: Optional[float] = None,
+    input: Optional[bytes] = None,
+) -> Optional[Tuple[int, bytes, bytes]]:
+    """
+    Run a command without blocking the event loop, feeding it `input`.
+    Returns (returncode, stdout, stderr), or None if it was killed after
+    `timeout`.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=subprocess.DEVNULL if input is None else subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
     )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(input), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return None
+    return proc.returncode, out, err
 
 
 # -------------------------------------------------
 # K8S IMAGE DISCOVERY (image → namespaces)
 # -------------------------------------------------
-def get_images_per_namespace(kubectl_cmd: List[str]) -> Dict[str, Set[str]]:
+def parse_name_pairs(field: str) -> Dict[str, str]:
+    # "name=value name=value ..." (neither side ever contains spaces)
+    pairs: Dict[str, str] = {}
+    for tok in field.split():
+        name, _, value = tok.partition("=")
+        if value:
+            pairs[name] = value
+    return pairs
+
+
+def get_images_per_namespace(
+    kubectl_cmd: List[str],
+    field_selector: Optional[str] = None,
+) -> Tuple[Dict[str, Set[str]], Dict[str, str]]:
     """
     returns:
-       {
-         "imagename:tag": {"ns1", "ns2"},
-         ...
-       }
-    """
-    cmd = kubectl_cmd + ["get", "pods", "-A", "-o", "json"]
-    proc = run(cmd)
-    if proc.returncode != 0:
-        print(proc.stderr.decode(), file=sys.stderr)
-        sys.exit(1)
-
-    data = json.loads(proc.stdout.decode() or "{}")
+       (
+         {"imagename:tag": {"ns1", "ns2"}, ...},
+         {"imagename:tag": "sha256:...", ...},   # only for running containers
+       )
+    """
+    # Only namespace + image fields are requested (one pod per line) rather
+    # than the full pod objects, so no JSON has to be transferred or parsed.
+    cmd = kubectl_cmd + [
+        "get", "pods", "-A",
+        f"--chunk-size={CONFIG['list_chunk_size']}",
+        "-o", f"jsonpath={CONFIG['pods_jsonpath']}",
+    ]
+    if field_selector:
+        cmd.append(f"--field-selector={field_selector}")
+    # stderr goes to a file, not a second pipe: a kubectl that fills the
+    # stderr pipe while stdout is being drained would block forever.
+    errors = tempfile.TemporaryFile()
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=errors,
+    )
     images: Dict[str, Set[str]] = defaultdict(set)
+    digests: Dict[str, str] = {}
 
-    for item in data.get("items", []):
-        ns = item["metadata"]["namespace"]
-        spec = item.get("spec", {})
+    # line: "<namespace>\t<name>=<image> ...\t<name>=<imageID> ..."
+    for raw in proc.stdout:
+        ns, _, rest = raw.decode().rstrip("\n").partition("\t")
+        if not ns:
+            continue
+        spec_field, _, status_field = rest.partition("\t")
+        spec_images = parse_name_pairs(spec_field)
+        image_ids = parse_name_pairs(status_field)
 
-        for c in spec.get("containers", []):
-            if c.get("image"):
-                images[c["image"]].add(ns)
+        for name, img in spec_images.items():
+            images[img].add(ns)
+            if name in image_ids:
+                digests.setdefault(img, image_digest(image_ids[name]))
 
-        for c in spec.get("initContainers", []):
-            if c.get("image"):
-                images[c["image"]].add(ns)
+    with errors:
+        if proc.wait() != 0:
+            errors.seek(0)
+            print(errors.read().decode(), file=sys.stderr)
+            sys.exit(1)
 
-        for c in spec.get("ephemeralContainers", []):
-            if c.get("image"):
-                images[c["image"]].add(ns)
+    return images, digests
 
-    return images
+
+def get_images_per_namespace_api(
+    field_selector: Optional[str] = None,
+) -> Optional[Tuple[Dict[str, Set[str]], Dict[str, str]]]:
+    """
+    Same result as get_images_per_namespace, read through the kubernetes
+    client (kubeconfig, one kept-alive connection, no kubectl process).
+    Pages are fetched raw and decoded into plain dicts, which is much cheaper
+    than building V1Pod models. Returns None if the client is not installed
+    or no kubeconfig can be loaded, and also if the listing fails (403,
+    expired token, unreachable context...): kubectl is then asked instead.
+    """
+    if k8s_client is None:
+        return None
+    try:
+        k8s_config.load_kube_config()
+    except Exception:
+        return None
+    core = k8s_client.CoreV1Api()
+
+    try:
+        return list_pod_images(core, field_selector)
+    except Exception as e:
+        print(f"cannot list pods through the API ({e}), using kubectl", file=sys.stderr)
+        return None
+
+
+def list_pod_images(
+    core: Any, field_selector: Optional[str]
+) -> Tuple[Dict[str, Set[str]], Dict[str, str]]:
+    images: Dict[str, Set[str]] = defaultdict(set)
+    digests: Dict[str, str] = {}
+    token = None
+    while True:
+        kwargs: Dict[str, Any] = {"limit": CONFIG["list_chunk_size"], "_preload_content": False}
+        if token:
+            kwargs["_continue"] = token
+        if field_selector:
+            kwargs["field_selector"] = field_selector
+        resp = core.list_pod_for_all_namespaces(**kwargs)
+        try:
+            page = json_loads(resp.data)
+        finally:
+            resp.release_conn()
+
+        for pod in page.get("items") or []:
+            ns = pod["metadata"]["namespace"]
+            spec = pod.get("spec") or {}
+            status = pod.get("status") or {}
+            image_ids = {
+                cs["name"]: cs["imageID"]
+                for key in ("containerStatuses", "initContainerStatuses", "ephemeralContainerStatuses")
+                for cs in status.get(key) or []
+                if cs.get("imageID")
+            }
+            for key in ("containers", "initContainers", "ephemeralContainers"):
+                for c in spec.get(key) or []:
+                    img = c.get("image")
+                    if not img:
+                        continue
+                    images[img].add(ns)
+                    if c.get("name") in image_ids:
+                        digests.setdefault(img, image_digest(image_ids[c["name"]]))
+
+        token = (page.get("metadata") or {}).get("continue")
+        if not token:
+            return images, digests
+        # at most one page is alive at a time: drop it before the next fetch
+        del page, resp
+
+
+# -------------------------------------------------
+# SCAN RESULT CACHE (digest → certs)
+# -------------------------------------------------
+def cache_file(cache_dir: str, digest: str, ca_paths: List[str]) -> str:
+    # keyed by digest + scanned dirs + parser, so changing ca_paths or
+    # installing/removing cryptography invalidates entries
+    key = hashlib.sha256("\0".join([digest, CERT_PARSER] + ca_paths).encode()).hexdigest()
+    return os.path.join(cache_dir, key + ".json")
+
+
+def load_cached_certs(path: str, ttl_sec: float) -> Optional[List[Dict]]:
+    # ttl_sec <= 0: entries never expire
+    try:
+        if ttl_sec > 0 and time.time() - os.stat(path).st_mtime > ttl_sec:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_cached_certs(path: str, certs: List[Dict]) -> None:
+    # tmp file + rename: concurrent runs never read a half-written entry
+    cache_dir = os.path.dirname(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(certs, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"cannot write cache {path}: {e}", file=sys.stderr)
 
 
 # -------------------------------------------------
 # DOCKER / NERDCTL HELPERS
 # -------------------------------------------------
-def pull_image(runtime_cmd: List[str], image: str) -> bool:
-    proc = run(runtime_cmd + ["pull", image])
-    return proc.returncode == 0
+async def pull_image(runtime_cmd: List[str], image: str, retries: int = CONFIG["pull_retries"]) -> bool:
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(attempt)
+        res = await run(runtime_cmd + ["pull", image])
+        if res is not None and res[0] == 0:
+            return True
+    return False
 
 
-def extract_certs(runtime_cmd: List[str], image: str, ca_paths: List[str]) -> List[Dict]:
+async def local_image_id(runtime_cmd: List[str], image: str) -> Optional[str]:
+    # ID of the pulled image's config: the same for every tag of that content
+    res = await run(runtime_cmd + ["image", "inspect", "--format", "{{.Id}}", image])
+    if res is None or res[0] != 0:
+        return None
+    return res[1].decode().strip() or None
+
+
+async def ensure_image(runtime_cmd: List[str], image: str, retries: int = CONFIG["pull_retries"]) -> Optional[str]:
+    """
+    Local image ID of `image`, pulling it first unless it is a repo@digest
+    ref that is already present (a tag could have moved in the registry,
+    a digest cannot). None if the pull fails.
+    """
+    if "@" in image:
+        image_id = await local_image_id(runtime_cmd, image)
+        if image_id:
+            return image_id
+    if not await pull_image(runtime_cmd, image, retries):
+        return None
+    return await local_image_id(runtime_cmd, image) or image
+
+
+PEM_CERT_RE = re.compile(
+    rb"-----BEGIN CERTIFICATE-----.+?-----END CERTIFICATE-----", re.DOTALL
+)
+# openssl names for attributes RFC 4514 only knows by dotted OID
+OPENSSL_ATTR_NAMES = {
+    "1.2.840.113549.1.9.1": "emailAddress",
+    "2.5.4.5": "serialNumber",
+    "2.5.4.97": "organizationIdentifier",
+}
+OPENSSL_QUOTED = set(',+;<>"\\')
+
+
+def openssl_subject(name) -> str:
+    """
+    Render an x509.Name the way `openssl x509 -noout -subject` does
+    ("subject=C = US, O = ..."), so both parsers produce the same subject
+    strings for the policy; non-ASCII stays UTF-8 instead of \\XX escapes.
+    """
+    def value(v: str) -> str:
+        return '"%s"' % v if OPENSSL_QUOTED & set(v) else v
+
+    parts = []
+    for rdn in name.rdns:
+        parts.append(" + ".join(
+            "%s = %s" % (
+                OPENSSL_ATTR_NAMES.get(a.oid.dotted_string) or a.rfc4514_attribute_name,
+                value(a.value),
+            )
+            for a in rdn
+        ))
+    return "subject=" + ", ".join(parts)
+
+
+def pem_subjects_in_process(data: bytes) -> List[str]:
+    certs = None
+    if hasattr(x509, "load_pem_x509_certificates"):     # cryptography 39+
+        try:
+            certs = x509.load_pem_x509_certificates(data)
+        except ValueError:
+            pass
+    if certs is None:
+        # older cryptography, or one bad block failed the bundle: load the
+        # good ones individually
+        certs = []
+        for block in PEM_CERT_RE.findall(data):
+            try:
+                certs.append(x509.load_pem_x509_certificate(block))
+            except ValueError:
+                continue
+    return [openssl_subject(cert.subject) for cert in certs]
+
+
+async def openssl_bundle_subjects(openssl_cmd: List[str], data: bytes) -> Optional[List[str]]:
+    # None if openssl rejects the bundle
+    res = await run(openssl_cmd + ["crl2pkcs7", "-nocrl", "-certfile", "/dev/stdin"], input=data)
+    if res is None or res[0] != 0:
+        return None
+    res = await run(openssl_cmd + ["pkcs7", "-print_certs", "-noout"], input=res[1])
+    if res is None or res[0] != 0:
+        return None
+    return [
+        line for line in res[1].decode().splitlines()
+        if line.startswith("subject=")
+    ]
+
+
+async def pem_subjects(openssl_cmd: List[str], data: bytes) -> List[str]:
+    """
+    "subject=..." lines of every certificate in a PEM file.
+
+    With `cryptography` installed the bundle is parsed in-process. Otherwise
+    the host's openssl gets the whole bundle through one crl2pkcs7 + pkcs7
+    pair; if that rejects it (e.g. one malformed block) the good blocks are
+    parsed one by one.
+    """
+    if x509 is not None:
+        return pem_subjects_in_process(data)
+
+    subjects = await openssl_bundle_subjects(openssl_cmd, data)
+    if subjects is not None:
+        return subjects
+
+    subjects = []
+    for block in PEM_CERT_RE.findall(data):
+        res = await run(openssl_cmd + ["x509", "-noout", "-subject"], input=block + b"\n")
+        if res is not None and res[0] == 0 and res[1].strip():
+            subjects.append(res[1].decode().strip())
+    return subjects
+
+
+async def pem_subjects_per_file(openssl_cmd: List[str], files: List[bytes]) -> List[List[str]]:
+    """
+    pem_subjects() of each file. Without `cryptography` all files share one
+    openssl pipeline: subjects come out in input order, so the PEM block
+    count of each file maps them back. If openssl rejects the lot (e.g. one
+    malformed block) or the counts don't add up, each half is retried, down
+    to single files.
+    """
+    if x509 is None and len(files) > 1:
+        counts = [len(PEM_CERT_RE.findall(data)) for data in files]
+        subjects = await openssl_bundle_subjects(openssl_cmd, b"\n".join(files))
+        if subjects is not None and len(subjects) == sum(counts):
+            per_file, start = [], 0
+            for n in counts:
+                per_file.append(subjects[start:start + n])
+                start += n
+            return per_file
+        half = len(files) // 2
+        return (await pem_subjects_per_file(openssl_cmd, files[:half])
+                + await pem_subjects_per_file(openssl_cmd, files[half:]))
+    return [await pem_subjects(openssl_cmd, data) for data in files]
+
+
+# symlinked CA directories followed per base before giving up (link loops)
+MAX_LINK_HOPS = 10
+# how `cp` reports a path the image does not have (docker, older docker,
+# podman); any other cp failure means the directory could not be read
+CP_NOT_FOUND = (
+    b"Could not find the file",
+    b"No such container:path",
+    b"could not be found on container",
+)
+
+
+def tar_symlink_target(data: bytes) -> Optional[str]:
+    """
+    The link target if the tar stream holds nothing but one symlink (what
+    `cp` produces for a symlinked path), else None.
+    """
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r|") as tar:
+        first = tar.next()
+        if first is None or not first.issym():
+            return None
+        return first.linkname if tar.next() is None else None
+
+
+async def copy_dir(
+    runtime_cmd: List[str], cid: str, base: str
+) -> Optional[Tuple[str, bytes]]:
+    """
+    (resolved path, tar stream) of `base` in the container, or None if it is
+    not there. `cp` copies a symlinked directory as the link itself, so the
+    link is followed inside the container's filesystem (openSUSE's
+    /etc/ssl/certs -> /var/lib/ca-certificates/pem) and the target copied.
+
+    Raises RuntimeError if the copy fails for any other reason (timeout,
+    daemon error, broken tar stream): the image was then not fully read.
+    """
+    path = posixpath.normpath(base)
+    for _ in range(MAX_LINK_HOPS):
+        res = await run(runtime_cmd + ["cp", f"{cid}:{path}", "-"], timeout=40)
+        if res is None:
+            raise RuntimeError(f"cp of {path} timed out")
+        if res[0] != 0:
+            if any(msg in res[2] for msg in CP_NOT_FOUND):
+                return None     # path not in this image
+            raise RuntimeError(f"cp of {path} failed: {res[2].decode(errors='replace').strip()}")
+        try:
+            target = tar_symlink_target(res[1])
+        except tarfile.TarError as e:
+            raise RuntimeError(f"cp of {path} is not a tar stream: {e}")
+        if target is None:
+            return path, res[1]
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+    return None
+
+
+def dedup_dirs(copies: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    # drop directories another one already covers (e.g. /etc/ssl/certs ->
+    # ../pki/tls/certs next to /etc/pki), so each file is read once
+    kept: List[Tuple[str, bytes]] = []
+    for path, data in copies:
+        if any(path == p or path.startswith(p.rstrip("/") + "/") for p, _ in kept):
+            continue
+        kept = [(p, d) for p, d in kept if not p.startswith(path.rstrip("/") + "/")]
+        kept.append((path, data))
+    return kept
+
+
+async def extract_certs(
+    runtime_cmd: List[str],
+    image: str,
+    ca_paths: List[str],
+    openssl_cmd: List[str],
+) -> Optional[List[Dict]]:
     """
     returns list of:
        [{"path": "...", "subject": "..."}]
+    or None if the image's filesystem could not be (fully) read
+
+    The container is only created, never started: the CA directories are
+    copied out as tar streams (`cp <id>:<dir> -`, see copy_dir) and parsed on
+    the host, so the image needs no shell or openssl of its own.
     """
-    ca_paths_arg = " ".join(ca_paths)
-
-    script = f"""#!/bin/sh
-set -e
-
-for base in {ca_paths_arg}; do
-  if [ -d "$base" ]; then
-    find "$base" -type f 2>/dev/null | while read f; do
-      # Fast skip: no PEM blocks
-      grep -q "BEGIN CERTIFICATE" "$f" 2>/dev/null || continue
-
-      tmpdir="$(mktemp -d /tmp/cacerts.XXXXXX 2>/dev/null || mktemp -d)"
-
-      awk '
-        /-----BEGIN CERTIFICATE-----/ {{
-          in_cert = 1
-          idx++
-          fn = sprintf("%s/cert-%04d.pem", d, idx)
-          print > fn
-          next
-        }}
-        /-----END CERTIFICATE-----/ {{
-          if (in_cert) {{
-            print >> fn
-            close(fn)
-            in_cert = 0
-          }}
-          next
-        }}
-        {{
-          if (in_cert) {{
-            print >> fn
-          }}
-        }}
-      ' d="$tmpdir" "$f"
-
-      for pem in "$tmpdir"/cert-*.pem; do
-        [ -f "$pem" ] || continue
-        sub="$(openssl x509 -in "$pem" -noout -subject 2>/dev/null || true)"
-        if [ -n "$sub" ]; then
-          printf '%s\\t%s\\n' "$f" "$sub"
-        fi
-      done
-
-      rm -rf "$tmpdir"
-    done
-  fi
-done
-"""
-
-    cmd = runtime_cmd + [
-        "run",
-        "--rm",
-        "--pull=never",
-        "--entrypoint=/bin/sh",
-        image,
-        "-c",
-        script,
-    ]
+    res = await run(runtime_cmd + ["create", "--entrypoint=/bin/true", image], timeout=40)
+    if res is None or res[0] != 0:
+        return None
+    cid = res[1].decode().strip()
 
+    files: List[Tuple[str, bytes]] = []
     try:
-        proc = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=40,
-        )
-    except subprocess.TimeoutExpired:
-        return []
-
-    if proc.returncode != 0:
-        return []
+        # all directories are copied out at once: each cp is a round trip to
+        # the daemon, most of it spent waiting rather than copying
+        copies = await asyncio.gather(*(
+            copy_dir(runtime_cmd, cid, base) for base in ca_paths
+        ), return_exceptions=True)
+        # a directory that failed to copy would make the result look like
+        # an image without those certificates, and it would be cached so
+        errors = [c for c in copies if isinstance(c, Exception)]
+        if errors:
+            print(f"cannot read CA directories of {image}: {errors[0]}", file=sys.stderr)
+            return None
+        for path, data in dedup_dirs([c for c in copies if c is not None]):
+            # members are named relative to the parent of `path`
+            parent = posixpath.dirname(path)
+            try:
+                with tarfile.open(fileobj=io.BytesIO(data), mode="r|") as tar:
+                    # regular files only: symlinks and hardlinks point at
+                    # files that are (or will be) read under their own name
+                    for member in tar:
+                        if not member.isreg():
+                            continue
+                        content = tar.extractfile(member).read()
+                        if b"BEGIN CERTIFICATE" not in content:
+                            continue
+                        files.append((posixpath.join(parent, member.name), content))
+            except tarfile.TarError as e:
+                print(f"cannot read {path} of {image}: {e}", file=sys.stderr)
+                return None
+    finally:
+        await run(runtime_cmd + ["rm", "-f", cid])
 
     certs = []
-    for line in proc.stdout.decode().splitlines():
-        if "\t" not in line:
-            continue
-        path, subject = line.split("\t", 1)
-        certs.append({"path": path, "subject": subject})
+    subjects = await pem_subjects_per_file(openssl_cmd, [data for _, data in files])
+    for (path, _), file_subjects in zip(files, subjects):
+        for subject in file_subjects:
+            certs.append({"path": path, "subject": subject})
     return certs
 
 
 # -------------------------------------------------
 # MAIN
 # -------------------------------------------------
-def main():
-    parser = argparse.ArgumentParser(description="Extract CA certificates from K8S images → JSON output")
-    parser.add_argument("--kubectl", nargs="+", default=CONFIG["kubectl_cmd"])
-    parser.add_argument("--runtime", nargs="+", default=CONFIG["runtime_cmd"])
-    args = parser.parse_args()
-
-    kubectl_cmd = args.kubectl
-    runtime_cmd = args.runtime
-    ca_paths = CONFIG["ca_paths"]
-
-    # Get: image → namespaces
-    images_map = get_images_per_namespace(kubectl_cmd)
-
+async def scan_all(
+    kubectl_cmd: List[str],
+    runtime_cmd: List[str],
+    openssl_cmd: List[str],
+    ca_paths: List[str],
+    concurrency: int,
+    cache_dir: Optional[str] = None,
+    cache_ttl_sec: float = 0,
+    field_selector: Optional[str] = None,
+) -> List[Dict]:
+    # Get: image → namespaces, image → digest
+    # the API client is only used if kubectl was not customised on the
+    # command line (a custom --kubectl may carry --context and the like)
+    listed = None
+    if kubectl_cmd == CONFIG["kubectl_cmd"]:
+        listed = get_images_per_namespace_api(field_selector)
+    images_map, image_digests = listed or get_images_per_namespace(kubectl_cmd, field_selector)
+
+    # Tags resolving to the same digest are scanned once, via whichever of
+    # them pulls first.
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for image in images_map:
+        groups[image_digests.get(image) or image].append(image)
+
+    digests = set(image_digests.values())
+    # Pulls (registry-bound) and extractions (local disk/CPU) have separate
+    # limits, so the next images keep downloading while earlier ones are
+    # being scanned.
+    pull_sem = asyncio.Semaphore(max(1, concurrency))
+    scan_sem = asyncio.Semaphore(max(1, concurrency))
+
+    # Groups without a status digest (pods that never started) or with
+    # different repo digests can still be the same image once pulled:
+    # one scan per local image ID, shared by every group that resolves to it.
+    scans: Dict[str, "asyncio.Future[Optional[List[Dict]]]"] = {}
+
+    async def scan_image(image: str) -> Optional[List[Dict]]:
+        async with scan_sem:
+            return await extract_certs(runtime_cmd, image, ca_paths, openssl_cmd)
+
+    async def scan_group(key: str, images: List[str]) -> List[Dict]:
+        # only digests are cached: a bare tag can point elsewhere next run
+        path = None
+        if cache_dir and key in digests:
+            path = cache_file(cache_dir, key, ca_paths)
+            cached = load_cached_certs(path, cache_ttl_sec)
+            if cached is not None:
+                return cached
+        # pull the running content by digest first, the tags are the fallback
+        # (e.g. when the digest is not the registry's manifest digest)
+        pinned = pinned_ref(images[0], key) if key in digests else None
+        async with pull_sem:
+            for image in ([pinned] if pinned else []) + images:
+                # a missing digest is not a hiccup: don't retry it
+                retries = 0 if image == pinned else CONFIG["pull_retries"]
+                image_id = await ensure_image(runtime_cmd, image, retries)
+                if image_id:
+                    break
+            else:
+                return []
+        # no status digest: the pulled image's ID is content-addressed too,
+        # so a re-run still skips the extraction (not the pull)
+        if cache_dir and path is None and image_id.startswith("sha256:"):
+            path = cache_file(cache_dir, image_id, ca_paths)
+            cached = load_cached_certs(path, cache_ttl_sec)
+            if cached is not None:
+                return cached
+        if image_id not in scans:
+            scans[image_id] = asyncio.ensure_future(scan_image(image))
+        certs = await scans[image_id]
+        if certs is None:
+            return []
+        if path:
+            store_cached_certs(path, certs)
+        return certs
+
+    keys = list(groups)
+    scanned = await asyncio.gather(*(scan_group(k, groups[k]) for k in keys))
+    certs_by_key = dict(zip(keys, scanned))
+
+    # sorted like the k8s variant: stable output regardless of pod order
     result = []
-
-    for image, namespaces in images_map.items():
-        pull_ok = pull_image(runtime_cmd, image)
-        cert_list = []
-
-        if pull_ok:
-            cert_list = extract_certs(runtime_cmd, image, ca_paths)
-
+    for image, namespaces in sorted(images_map.items()):
         result.append({
             "image": image,
             "namespaces": sorted(list(namespaces)),
-            "certs": cert_list,   # always include, even if empty
+            "certs": certs_by_key[image_digests.get(image) or image],   # always include, even if empty
         })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract CA certificates from K8S images → JSON output")
+    parser.add_argument("--kubectl", nargs="+", default=CONFIG["kubectl_cmd"])
+    parser.add_argument("--runtime", nargs="+", default=CONFIG["runtime_cmd"])
+    parser.add_argument("--openssl", nargs="+", default=CONFIG["openssl_cmd"],
+                        help="host openssl used to parse the copied-out certificates")
+    parser.add_argument("--pretty", action="store_true", help="indent the JSON output (default: compact)")
+    parser.add_argument("--concurrency", "--jobs", type=int, default=CONFIG["concurrency"],
+                        help=f"images pulled, and images scanned, at the same time (default: {CONFIG['concurrency']})")
+    parser.add_argument("--cache-dir", default=CONFIG["cache_dir"],
+                        help=f"per-digest scan results (default: {CONFIG['cache_dir']})")
+    parser.add_argument("--cache-ttl", type=float, default=CONFIG["cache_ttl_hours"],
+                        help=f"hours a cached result stays valid, 0 = forever (default: {CONFIG['cache_ttl_hours']:g})")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the scan cache")
+    parser.add_argument("--running-only", action="store_true",
+                        help="only list Running pods (server-side field selector); images of "
+                             "pending, completed and failed pods are then left out")
+    args = parser.parse_args()
 
-    print(json.dumps(result, indent=2))
+    result = asyncio.run(scan_all(
+        args.kubectl,
+        args.runtime,
+        args.openssl,
+        CONFIG["ca_paths"],
+        args.concurrency,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_ttl_sec=args.cache_ttl * 3600,
+        field_selector="status.phase=Running" if args.running_only else None,
+    ))
+
+    write_json_list(result, sys.stdout, args.pretty)
+    sys.stdout.write("\n")
 
 
 if __name__ == "__main__":
@@ -1,129 +1,37 @@
 #!/usr/bin/env python3
 import argparse
-import json
+import gzip
+import os
 import sys
-import html
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from ca_json import json_loads
+from ca_report_rows import esc, render_row
+
+# a row renders in ~20us, starting a process pool takes ~50ms: below this
+# many images the pool costs more than it saves
+PARALLEL_ROWS_MIN = 5000
 
 
 def load_json(path: str):
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            data = f.read()
+        return json_loads(data)
     except Exception as e:
         print(f"ERROR: cannot read JSON {path}: {e}", file=sys.stderr)
         sys.exit(1)
 
 
-def build_html(report):
-    # report: list of entries from ca-analyse.py
-    status_counter = Counter()
-    ns_counter = Counter()
-
-    for item in report:
-        status = item.get("status", "UNKNOWN")
-        status_counter[status] += 1
-        for ns in item.get("namespaces", []):
-            ns_counter[ns] += 1
-
-    total_images = len(report)
-
-    def esc(s: str) -> str:
-        return html.escape(str(s), quote=True)
-
-    # Build namespace summary HTML
-    ns_rows = []
-    for ns, count in sorted(ns_counter.items(), key=lambda kv: kv[0]):
-        ns_rows.append(
-            f"<tr><td>{esc(ns)}</td><td>{count}</td></tr>"
-        )
-    ns_table_html = (
-        "<table class='ns-table'>"
-        "<thead><tr><th>Namespace</th><th>Images</th></tr></thead>"
-        "<tbody>"
-        + "".join(ns_rows)
-        + "</tbody></table>"
-    )
-
-    # Build rows for main table
-    rows_html = []
-    for idx, item in enumerate(report, start=1):
-        image = item.get("image", "")
-        status = item.get("status", "UNKNOWN")
-        namespaces = item.get("namespaces", [])
-        blacklist_matches = item.get("blacklist_matches", []) or []
-        whitelist_matches = item.get("whitelist_matches", []) or []
-        not_matched = item.get("not_matched", []) or []
-
-        status_lower = status.lower()
-
-        # Join namespaces
-        ns_html = ", ".join(esc(ns) for ns in namespaces) if namespaces else "&mdash;"
-
-        # Build cert details
-        def cert_list_html(title, certs, css_class):
-            if not certs:
-                return ""
-            items = []
-            for c in certs:
-                path = esc(c.get("path", ""))
-                subject = esc(c.get("subject", ""))
-                pat = esc(c.get("pattern", "")) if "pattern" in c else ""
-                pat_span = f"<span class='pattern'>{pat}</span> " if pat else ""
-                items.append(
-                    f"<li>{pat_span}<code class='cert-path'>{path}</code><br>"
-                    f"<span class='cert-subject'>{subject}</span></li>"
-                )
-            return (
-                f"<details class='cert-block {css_class}' open>"
-                f"<summary>{esc(title)} ({len(certs)})</summary>"
-                f"<ul>{''.join(items)}</ul>"
-                "</details>"
-            )
-
-        bl_html = cert_list_html("Blacklisted matches", blacklist_matches, "bl")
-        wl_html = cert_list_html("Whitelisted matches", whitelist_matches, "wl")
-        nm_html = cert_list_html("Other certificates", not_matched, "nm")
-
-        certs_html = bl_html + wl_html + nm_html
-        if not certs_html:
-            certs_html = "<span class='no-certs'>&mdash;</span>"
-
-        # for search
-        search_text = " ".join(
-            [
-                image,
-                " ".join(namespaces),
-                " ".join(c.get("subject", "") for c in blacklist_matches),
-                " ".join(c.get("subject", "") for c in whitelist_matches),
-                " ".join(c.get("subject", "") for c in not_matched),
-            ]
-        )
-
-        rows_html.append(
-            f"<tr class='image-row' "
-            f"data-status='{esc(status_lower)}' "
-            f"data-search='{esc(search_text.lower())}'>"
-            f"<td class='col-idx'>{idx}</td>"
-            f"<td class='col-status'><span class='status-badge status-{esc(status_lower)}'>{esc(status)}</span></td>"
-            f"<td class='col-image'><code>{esc(image)}</code></td>"
-            f"<td class='col-ns'>{ns_html}</td>"
-            f"<td class='col-certs'>{certs_html}</td>"
-            "</tr>"
-        )
-
-    # Status summary numbers
-    green_count = status_counter.get("GREEN", 0)
-    yellow_count = status_counter.get("YELLOW", 0)
-    red_count = status_counter.get("RED", 0)
-
-    html_doc = f"""<!DOCTYPE html>
+# Static parts of the page: plain strings, no {{ }} escaping needed
+HTML_HEAD = """<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="utf-8">
   <title>Kubernetes CA Report</title>
   <style>
-    :root {{
+    :root {
       --bg: #0f172a;
       --bg-alt: #020617;
       --card-bg: #020617;
@@ -136,65 +44,65 @@ def build_html(report):
       --red: #ef4444;
       --mono: Menlo, Monaco, SFMono-Regular, Consolas, "Liberation Mono", "Courier New", monospace;
       --sans: system-ui, -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-    }}
-    * {{
+    }
+    * {
       box-sizing: border-box;
-    }}
-    body {{
+    }
+    body {
       margin: 0;
       padding: 0;
       font-family: var(--sans);
       background: radial-gradient(circle at top left, #1e293b 0, #020617 50%, #000 100%);
       color: var(--text);
-    }}
-    .page {{
+    }
+    .page {
       max-width: 1200px;
       margin: 0 auto;
       padding: 24px 16px 40px;
-    }}
-    h1 {{
+    }
+    h1 {
       font-size: 28px;
       margin-bottom: 4px;
-    }}
-    .subtitle {{
+    }
+    .subtitle {
       color: var(--text-muted);
       font-size: 14px;
       margin-bottom: 20px;
-    }}
-    .summary-grid {{
+    }
+    .summary-grid {
       display: grid;
       grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
       gap: 12px;
       margin-bottom: 20px;
-    }}
-    .card {{
+    }
+    .card {
       background: linear-gradient(145deg, rgba(15,23,42,0.95), rgba(15,23,42,0.75));
       border-radius: 12px;
       border: 1px solid rgba(148,163,184,0.15);
       padding: 12px 14px;
       backdrop-filter: blur(16px);
       box-shadow: 0 18px 40px rgba(15,23,42,0.7);
-    }}
-    .card-title {{
+    }
+    .card-title {
       font-size: 12px;
       text-transform: uppercase;
       letter-spacing: 0.08em;
       color: var(--text-muted);
       margin-bottom: 4px;
-    }}
-    .card-value {{
+    }
+    .card-value {
       font-size: 22px;
       font-weight: 600;
-    }}
-    .card-label {{
+    }
+    .card-label {
       font-size: 12px;
       color: var(--text-muted);
       margin-top: 2px;
-    }}
-    .card-status-green .card-value {{ color: var(--green); }}
-    .card-status-yellow .card-value {{ color: var(--yellow); }}
-    .card-status-red .card-value {{ color: var(--red); }}
-    .controls {{
+    }
+    .card-status-green .card-value { color: var(--green); }
+    .card-status-yellow .card-value { color: var(--yellow); }
+    .card-status-red .card-value { color: var(--red); }
+    .controls {
       display: flex;
       flex-wrap: wrap;
       align-items: center;
@@ -204,20 +112,20 @@ def build_html(report):
       border-radius: 12px;
       border: 1px solid rgba(148,163,184,0.25);
       padding: 10px 14px;
-    }}
-    .controls-group {{
+    }
+    .controls-group {
       display: flex;
       align-items: center;
       gap: 10px;
       flex-wrap: wrap;
-    }}
-    .controls-label {{
+    }
+    .controls-label {
       font-size: 12px;
       text-transform: uppercase;
       letter-spacing: 0.06em;
       color: var(--text-muted);
-    }}
-    .chip {{
+    }
+    .chip {
       display: inline-flex;
       align-items: center;
       gap: 6px;
@@ -228,12 +136,12 @@ def build_html(report):
       cursor: pointer;
       user-select: none;
       background: rgba(15,23,42,0.9);
-    }}
-    .chip input {{
+    }
+    .chip input {
       accent-color: var(--accent);
       cursor: pointer;
-    }}
-    .search-input {{
+    }
+    .search-input {
       padding: 5px 8px;
       border-radius: 999px;
       border: 1px solid rgba(148,163,184,0.4);
@@ -241,63 +149,63 @@ def build_html(report):
       color: var(--text);
       font-size: 13px;
       min-width: 220px;
-    }}
-    .search-input::placeholder {{
+    }
+    .search-input::placeholder {
       color: #6b7280;
-    }}
-    .tables {{
+    }
+    .tables {
       display: grid;
       grid-template-columns: minmax(0, 2fr) minmax(0, 1fr);
       gap: 16px;
-    }}
-    @media (max-width: 900px) {{
-      .tables {{ grid-template-columns: minmax(0, 1fr); }}
-    }}
-    .main-table-wrapper {{
+    }
+    @media (max-width: 900px) {
+      .tables { grid-template-columns: minmax(0, 1fr); }
+    }
+    .main-table-wrapper {
       background: rgba(15,23,42,0.85);
       border-radius: 12px;
       border: 1px solid rgba(148,163,184,0.3);
       overflow: hidden;
-    }}
-    table {{
+    }
+    table {
       border-collapse: collapse;
       width: 100%;
       font-size: 12px;
-    }}
-    thead {{
+    }
+    thead {
       background: rgba(15,23,42,0.96);
-    }}
-    th, td {{
+    }
+    th, td {
       padding: 6px 8px;
       border-bottom: 1px solid rgba(51,65,85,0.7);
       vertical-align: top;
-    }}
-    th {{
+    }
+    th {
       text-align: left;
       font-weight: 500;
       color: var(--text-muted);
       font-size: 11px;
       text-transform: uppercase;
       letter-spacing: 0.06em;
-    }}
-    tbody tr:nth-child(even) {{
+    }
+    tbody tr:nth-child(even) {
       background: rgba(15,23,42,0.80);
-    }}
-    tbody tr:nth-child(odd) {{
+    }
+    tbody tr:nth-child(odd) {
       background: rgba(15,23,42,0.65);
-    }}
-    tbody tr:hover {{
+    }
+    tbody tr:hover {
       background: rgba(30,64,175,0.35);
-    }}
-    code {{
+    }
+    code {
       font-family: var(--mono);
       font-size: 11px;
       background: rgba(15,23,42,0.9);
       padding: 1px 4px;
       border-radius: 4px;
       border: 1px solid rgba(30,64,175,0.5);
-    }}
-    .status-badge {{
+    }
+    .status-badge {
       display: inline-flex;
       align-items: center;
       justify-content: center;
@@ -307,100 +215,100 @@ def build_html(report):
       font-weight: 600;
       text-transform: uppercase;
       letter-spacing: 0.06em;
-    }}
-    .status-green {{
+    }
+    .status-green {
       background: rgba(22,163,74,0.15);
       color: #4ade80;
       border: 1px solid rgba(34,197,94,0.6);
-    }}
-    .status-yellow {{
+    }
+    .status-yellow {
       background: rgba(234,179,8,0.15);
       color: #fde047;
       border: 1px solid rgba(234,179,8,0.6);
-    }}
-    .status-red {{
+    }
+    .status-red {
       background: rgba(248,113,113,0.15);
       color: #fecaca;
       border: 1px solid rgba(248,113,113,0.7);
-    }}
-    .col-idx {{ width: 36px; text-align: right; color: var(--text-muted); }}
-    .col-status {{ width: 90px; }}
-    .col-ns {{ width: 160px; }}
-    .col-image code {{ word-break: break-all; }}
-    .col-certs {{
+    }
+    .col-idx { width: 36px; text-align: right; color: var(--text-muted); }
+    .col-status { width: 90px; }
+    .col-ns { width: 160px; }
+    .col-image code { word-break: break-all; }
+    .col-certs {
       max-width: 420px;
-    }}
-    .ns-table-wrapper {{
+    }
+    .ns-table-wrapper {
       background: rgba(15,23,42,0.85);
       border-radius: 12px;
       border: 1px solid rgba(148,163,184,0.3);
       padding: 8px 10px 10px;
-    }}
-    .ns-table-caption {{
+    }
+    .ns-table-caption {
       font-size: 12px;
       text-transform: uppercase;
       letter-spacing: 0.06em;
       color: var(--text-muted);
       margin-bottom: 6px;
-    }}
-    .ns-table {{
+    }
+    .ns-table {
       font-size: 12px;
       border-collapse: collapse;
       width: 100%;
-    }}
-    .ns-table th, .ns-table td {{
+    }
+    .ns-table th, .ns-table td {
       padding: 4px 6px;
       border-bottom: 1px solid rgba(51,65,85,0.6);
-    }}
-    .ns-table th {{
+    }
+    .ns-table th {
       color: var(--text-muted);
       text-align: left;
       font-weight: 500;
       font-size: 11px;
-    }}
-    .ns-table td:first-child {{
+    }
+    .ns-table td:first-child {
       font-family: var(--mono);
       font-size: 11px;
-    }}
-    .ns-table tbody tr:nth-child(even) {{
+    }
+    .ns-table tbody tr:nth-child(even) {
       background: rgba(15,23,42,0.7);
-    }}
-    .ns-table tbody tr:nth-child(odd) {{
+    }
+    .ns-table tbody tr:nth-child(odd) {
       background: rgba(15,23,42,0.5);
-    }}
-    .cert-block {{
+    }
+    .cert-block {
       margin-bottom: 4px;
       border-radius: 6px;
       padding: 4px 6px;
       background: rgba(15,23,42,0.9);
       border: 1px solid rgba(31,41,55,0.9);
-    }}
-    .cert-block summary {{
+    }
+    .cert-block summary {
       cursor: pointer;
       font-size: 11px;
       color: var(--text-muted);
       outline: none;
-    }}
-    .cert-block ul {{
+    }
+    .cert-block ul {
       margin: 4px 0 0;
       padding-left: 18px;
-    }}
-    .cert-block li {{
+    }
+    .cert-block li {
       margin-bottom: 4px;
-    }}
-    .cert-block.bl {{
+    }
+    .cert-block.bl {
       border-color: rgba(239,68,68,0.8);
       box-shadow: 0 0 0 1px rgba(239,68,68,0.5);
-    }}
-    .cert-block.wl {{
+    }
+    .cert-block.wl {
       border-color: rgba(34,197,94,0.8);
       box-shadow: 0 0 0 1px rgba(34,197,94,0.45);
-    }}
-    .cert-block.nm {{
+    }
+    .cert-block.nm {
       border-color: rgba(148,163,184,0.5);
       box-shadow: 0 0 0 1px rgba(148,163,184,0.3);
-    }}
-    .pattern {{
+    }
+    .pattern {
       display: inline-block;
       font-size: 10px;
       color: var(--text-muted);
@@ -409,24 +317,24 @@ def build_html(report):
       background: rgba(15,23,42,0.9);
       border: 1px solid rgba(148,163,184,0.7);
       margin-bottom: 2px;
-    }}
-    .cert-path {{
+    }
+    .cert-path {
       font-size: 10px;
       background: rgba(15,23,42,0.9);
-    }}
-    .cert-subject {{
+    }
+    .cert-subject {
       font-size: 11px;
-    }}
-    .no-certs {{
+    }
+    .no-certs {
       color: var(--text-muted);
       font-size: 11px;
-    }}
-    .footer-note {{
+    }
+    .footer-note {
       margin-top: 16px;
       font-size: 11px;
       color: var(--text-muted);
       text-align: right;
-    }}
+    }
   </style>
 </head>
 <body>
@@ -436,30 +344,9 @@ def build_html(report):
     Static analysis of container images &amp; their CA certificates.
   </div>
 
-  <div class="summary-grid">
-    <div class="card">
-      <div class="card-title">Images scanned</div>
-      <div class="card-value">{total_images}</div>
-      <div class="card-label">Unique images across all namespaces</div>
-    </div>
-    <div class="card card-status-green">
-      <div class="card-title">Green</div>
-      <div class="card-value">{green_count}</div>
-      <div class="card-label">Whitelisted certs only</div>
-    </div>
-    <div class="card card-status-yellow">
-      <div class="card-title">Yellow</div>
-      <div class="card-value">{yellow_count}</div>
-      <div class="card-label">No blacklist, no whitelist</div>
-    </div>
-    <div class="card card-status-red">
-      <div class="card-title">Red</div>
-      <div class="card-value">{red_count}</div>
-      <div class="card-label">At least one blacklisted cert</div>
-    </div>
-  </div>
+"""
 
-  <div class="controls">
+HTML_TABLE_HEAD = """  <div class="controls">
     <div class="controls-group">
       <span class="controls-label">Filter status</span>
       <label class="chip">
@@ -495,60 +382,60 @@ def build_html(report):
           </tr>
         </thead>
         <tbody id="images-tbody">
-          {''.join(rows_html)}
-        </tbody>
-      </table>
-    </div>
-    <div class="ns-table-wrapper">
-      <div class="ns-table-caption">Images per namespace</div>
-      {ns_table_html}
-    </div>
-  </div>
+          """
 
-  <div class="footer-note">
-    Generated locally from report.json
-  </div>
-</div>
+# not an .image-row: the filters leave it alone
+HTML_NO_IMAGES_ROW = "<tr><td colspan='5' class='no-certs'>No images in this report</td></tr>"
 
-<script>
-(function() {{
+HTML_SCRIPT = """<script>
+(function() {
   const searchBox = document.getElementById('search-box');
   const cbGreen = document.getElementById('filter-green');
   const cbYellow = document.getElementById('filter-yellow');
   const cbRed = document.getElementById('filter-red');
-  const rows = Array.from(document.querySelectorAll('.image-row'));
-
-  function applyFilters() {{
+  // attributes are read once, not on every keystroke
+  const rows = Array.from(document.querySelectorAll('.image-row'), el => ({
+    el: el,
+    status: el.getAttribute('data-status'),
+    searchable: el.getAttribute('data-search') || '',
+    textMatch: true,
+    shown: true,
+  }));
+  let lastText = '';
+
+  function applyFilters() {
     const text = (searchBox.value || '').toLowerCase();
     const showGreen = cbGreen.checked;
     const showYellow = cbYellow.checked;
     const showRed = cbRed.checked;
+    // typing on: rows that did not contain the previous text cannot
+    // contain one that includes it, so only the matches are re-checked
+    const narrowing = text.includes(lastText);
+    lastText = text;
 
-    rows.forEach(row => {{
-      const status = row.getAttribute('data-status');
-      const searchable = row.getAttribute('data-search') || '';
+    rows.forEach(row => {
+      const status = row.status;
+      if (!narrowing || row.textMatch) {
+        row.textMatch = !text || row.searchable.includes(text);
+      }
 
       let statusVisible = false;
       if (status === 'green' && showGreen) statusVisible = true;
       if (status === 'yellow' && showYellow) statusVisible = true;
       if (status === 'red' && showRed) statusVisible = true;
-      if (status !== 'green' && status !== 'yellow' && status !== 'red') {{
+      if (status !== 'green' && status !== 'yellow' && status !== 'red') {
         // unknown status shows if any filter is on
         statusVisible = (showGreen || showYellow || showRed);
-      }}
+      }
 
-      let textVisible = true;
-      if (text && !searchable.includes(text)) {{
-        textVisible = false;
-      }}
-
-      if (statusVisible && textVisible) {{
-        row.style.display = '';
-      }} else {{
-        row.style.display = 'none';
-      }}
-    }});
-  }}
+      // only rows that change are touched, sparing the layout work
+      const show = statusVisible && row.textMatch;
+      if (show !== row.shown) {
+        row.el.style.display = show ? '' : 'none';
+        row.shown = show;
+      }
+    });
+  }
 
   searchBox.addEventListener('input', applyFilters);
   cbGreen.addEventListener('change', applyFilters);
@@ -556,19 +443,104 @@ def build_html(report):
   cbRed.addEventListener('change', applyFilters);
 
   applyFilters();
-}})();
+})();
 </script>
 
 </body>
 </html>
 """
-    return html_doc
+
+
+def write_html(report, out):
+    # report: list of entries from ca-analyse.py; rows are written to `out`
+    # as they are rendered instead of being collected into one string
+    status_counter = Counter(item.get("status", "UNKNOWN") for item in report)
+    ns_counter = Counter(ns for item in report for ns in item.get("namespaces", []))
+
+    total_images = len(report)
+
+    # Build namespace summary HTML
+    ns_rows = []
+    for ns, count in sorted(ns_counter.items(), key=lambda kv: kv[0]):
+        ns_rows.append(
+            f"<tr><td>{esc(ns)}</td><td>{count}</td></tr>"
+        )
+    ns_table_html = (
+        "<table class='ns-table'>"
+        "<thead><tr><th>Namespace</th><th>Images</th></tr></thead>"
+        "<tbody>"
+        + "".join(ns_rows)
+        + "</tbody></table>"
+    )
+
+    # Status summary numbers
+    green_count = status_counter.get("GREEN", 0)
+    yellow_count = status_counter.get("YELLOW", 0)
+    red_count = status_counter.get("RED", 0)
+
+    out.write(HTML_HEAD)
+    out.write(f"""  <div class="summary-grid">
+    <div class="card">
+      <div class="card-title">Images scanned</div>
+      <div class="card-value">{total_images}</div>
+      <div class="card-label">Unique images across all namespaces</div>
+    </div>
+    <div class="card card-status-green">
+      <div class="card-title">Green</div>
+      <div class="card-value">{green_count}</div>
+      <div class="card-label">Whitelisted certs only</div>
+    </div>
+    <div class="card card-status-yellow">
+      <div class="card-title">Yellow</div>
+      <div class="card-value">{yellow_count}</div>
+      <div class="card-label">No blacklist, no whitelist</div>
+    </div>
+    <div class="card card-status-red">
+      <div class="card-title">Red</div>
+      <div class="card-value">{red_count}</div>
+      <div class="card-label">At least one blacklisted cert</div>
+    </div>
+  </div>
+
+""")
+    out.write(HTML_TABLE_HEAD)
+
+    # Rows of the main table
+    if not report:
+        out.write(HTML_NO_IMAGES_ROW)
+    elif len(report) > PARALLEL_ROWS_MIN and (os.cpu_count() or 1) > 1:
+        # rendering is pure CPU work: spread large reports over all cores
+        with ProcessPoolExecutor() as ex:
+            for row in ex.map(render_row, range(1, total_images + 1), report, chunksize=64):
+                out.write(row)
+    else:
+        for idx, item in enumerate(report, start=1):
+            out.write(render_row(idx, item))
+
+    out.write(f"""
+        </tbody>
+      </table>
+    </div>
+    <div class="ns-table-wrapper">
+      <div class="ns-table-caption">Images per namespace</div>
+      {ns_table_html}
+    </div>
+  </div>
+
+  <div class="footer-note">
+    Generated locally from report.json
+  </div>
+</div>
+
+""")
+    out.write(HTML_SCRIPT)
 
 
 def main():
     p = argparse.ArgumentParser(description="Generate fancy static HTML report from ca-analyse report.json")
     p.add_argument("--report", required=True, help="report.json produced by ca-analyse.py")
-    p.add_argument("--output", "-o", required=False, help="output HTML file (default: stdout)")
+    p.add_argument("--output", "-o", required=False,
+                   help="output HTML file, gzip-compressed if it ends in .gz (default: stdout)")
     args = p.parse_args()
 
     report = load_json(args.report)
@@ -576,13 +548,17 @@ def main():
         print("ERROR: report JSON must be a list", file=sys.stderr)
         sys.exit(1)
 
-    html_str = build_html(report)
-
-    if args.output:
+    if args.output and args.output.endswith(".gz"):
+        # the rows repeat the same markup over and over: gzip shrinks the
+        # report several times over, and web servers can serve it as is
+        with gzip.open(args.output, "wt", encoding="utf-8", compresslevel=6) as f:
+            write_html(report, f)
+    elif args.output:
         with open(args.output, "w", encoding="utf-8") as f:
-            f.write(html_str)
+            write_html(report, f)
     else:
-        print(html_str)
+        write_html(report, sys.stdout)
+        print()
 
 
 if __name__ == "__main__":
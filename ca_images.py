@@ -0,0 +1,24 @@
+"""
+Image reference helpers shared by the scanners.
+"""
+
+
+def image_digest(image_id: str) -> str:
+    """
+    Reduce a containerStatuses imageID ("docker-pullable://repo@sha256:...",
+    "repo@sha256:...", "sha256:...") to its content digest.
+    """
+    return image_id.rpartition("@")[2]
+
+
+def pinned_ref(image: str, digest: str) -> str:
+    """
+    "registry:5000/app:v1" + "sha256:..." -> "registry:5000/app@sha256:...":
+    the exact content the pods run, even if the tag has moved since.
+    """
+    repo = image.split("@", 1)[0]
+    name_start = repo.rfind("/") + 1
+    tag_sep = repo.rfind(":")
+    if tag_sep >= name_start:
+        repo = repo[:tag_sep]
+    return f"{repo}@{digest}"
@@ -1,22 +1,49 @@
 #!/usr/bin/env python3
 import argparse
-import json
 import re
 import sys
-from typing import Any, Dict, List
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 from kubernetes import client, config
 from kubernetes.client import CustomObjectsApi
 from kubernetes.client.exceptions import ApiException
+from urllib3.util.retry import Retry
+
+from ca_json import json_loads
 
 GROUP = "security.andreybondarenko.com"
 VERSION = "v1alpha1"
 PLURAL = "caimagereports"
+FIELD_MANAGER = "canitiser-push-report"
+# namespaces' reports written at the same time (each is an independent
+# apply request). Plain threads on the synchronous client: the pushes
+# already finish in about one round trip, so kubernetes_asyncio would only
+# add a second client library to the image.
+UPSERT_WORKERS = 16
+# characters not allowed in a report name suffix
+NS_UNSAFE_RE = re.compile(r"[^a-z0-9-]")
 
 
 def load_k8s() -> CustomObjectsApi:
     config.load_incluster_config()
-    return client.CustomObjectsApi()
+    # One pooled connection per upsert worker. Apply is idempotent, so PATCH
+    # is retried along with the reads when the apiserver is overloaded.
+    cfg = client.Configuration.get_default_copy()
+    cfg.connection_pool_maxsize = max(
+        cfg.connection_pool_maxsize or 0, UPSERT_WORKERS
+    )
+    # raise_on_status=False: once retries run out the last response still
+    # surfaces as the usual ApiException
+    cfg.retries = Retry(
+        total=5,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"PATCH"},
+        raise_on_status=False,
+    )
+    return client.CustomObjectsApi(client.ApiClient(configuration=cfg))
 
 
 def build_spec(
@@ -25,9 +52,10 @@ def build_spec(
     scan_namespace: str,
 ) -> Dict[str, Any]:
     total = len(entries)
-    green = sum(1 for x in entries if x.get("status") == "GREEN")
-    yellow = sum(1 for x in entries if x.get("status") == "YELLOW")
-    red = sum(1 for x in entries if x.get("status") == "RED")
+    statuses = Counter(x.get("status") for x in entries)
+    green = statuses["GREEN"]
+    yellow = statuses["YELLOW"]
+    red = statuses["RED"]
 
     return {
         "scanRef": {
@@ -44,56 +72,71 @@ def build_spec(
     }
 
 
-def upsert_report(
-    api: CustomObjectsApi,
-    name: str,
-    namespace: str,
-    spec: Dict[str, Any],
-) -> None:
+def current_specs(api: CustomObjectsApi, namespace: str) -> Dict[str, Any]:
+    """
+    name -> spec of the CaImageReports already in the namespace, from one
+    LIST for the whole push. Empty (every report is applied) if the list
+    cannot be read.
+    """
     try:
-        api.get_namespaced_custom_object(
+        resp = api.list_namespaced_custom_object(
             group=GROUP,
             version=VERSION,
             namespace=namespace,
             plural=PLURAL,
-            name=name,
+            _preload_content=False,
         )
-        exists = True
     except ApiException as e:
-        if e.status == 404:
-            exists = False
-        else:
-            raise
-
-    if exists:
-        sys.stderr.write(
-            f"[push-report] patching existing {PLURAL}/{name} in {namespace}\n"
-        )
-        api.patch_namespaced_custom_object(
-            group=GROUP,
-            version=VERSION,
-            namespace=namespace,
-            plural=PLURAL,
-            name=name,
-            body={"spec": spec},
-        )
-    else:
         sys.stderr.write(
-            f"[push-report] creating new {PLURAL}/{name} in {namespace}\n"
-        )
-        body = {
-            "apiVersion": f"{GROUP}/{VERSION}",
-            "kind": "CaImageReport",
-            "metadata": {"name": name, "namespace": namespace},
-            "spec": spec,
-        }
-        api.create_namespaced_custom_object(
-            group=GROUP,
-            version=VERSION,
-            namespace=namespace,
-            plural=PLURAL,
-            body=body,
+            f"[push-report] cannot list {PLURAL} in {namespace} ({e.status}), "
+            f"applying all\n"
         )
+        return {}
+    try:
+        page = json_loads(resp.data)
+    finally:
+        resp.release_conn()
+    return {
+        item["metadata"]["name"]: item.get("spec")
+        for item in page.get("items") or []
+    }
+
+
+def upsert_report(
+    api: CustomObjectsApi,
+    name: str,
+    namespace: str,
+    spec: Dict[str, Any],
+    current: Optional[Dict[str, Any]] = None,
+) -> None:
+    # an unchanged report is not written again: no etcd write, no watch
+    # event for the UI
+    if current == spec:
+        sys.stderr.write(f"[push-report] {PLURAL}/{name} unchanged, skipping\n")
+        return
+
+    # Server-side apply creates or updates in one request, no GET first.
+    # force: take over fields last written by the old merge-patch upserts.
+    sys.stderr.write(
+        f"[push-report] applying {PLURAL}/{name} in {namespace}\n"
+    )
+    body = {
+        "apiVersion": f"{GROUP}/{VERSION}",
+        "kind": "CaImageReport",
+        "metadata": {"name": name, "namespace": namespace},
+        "spec": spec,
+    }
+    api.patch_namespaced_custom_object(
+        group=GROUP,
+        version=VERSION,
+        namespace=namespace,
+        plural=PLURAL,
+        name=name,
+        body=body,
+        field_manager=FIELD_MANAGER,
+        force=True,
+        _content_type="application/apply-patch+yaml",
+    )
 
     sys.stderr.write(f"[push-report] done for {name}\n")
 
@@ -104,7 +147,7 @@ def sanitize_ns(ns: str) -> str:
     Lowercase and replace anything not [a-z0-9-] with '-'.
     """
     s = ns.lower()
-    s = re.sub(r"[^a-z0-9-]", "-", s)
+    s = NS_UNSAFE_RE.sub("-", s)
     return s or "unknown"
 
 
@@ -119,8 +162,10 @@ def main() -> None:
     p.add_argument("--scan-namespace", required=True)
     args = p.parse_args()
 
-    with open(args.report_json, "r", encoding="utf-8") as f:
-        full_report: List[Dict[str, Any]] = json.load(f)
+    with open(args.report_json, "rb") as f:
+        data = f.read()
+    full_report: List[Dict[str, Any]] = json_loads(data)
+    del data
 
     sys.stderr.write(
         f"[push-report] loaded {len(full_report)} entries from {args.report_json}\n"
@@ -143,6 +188,7 @@ def main() -> None:
         return
 
     api = load_k8s()
+    existing = current_specs(api, args.report_namespace)
 
     # If there is exactly one namespace, keep the old name semantics:
     # use --report-name as-is for backward compatibility.
@@ -157,12 +203,13 @@ def main() -> None:
             name=args.report_name,
             namespace=args.report_namespace,
             spec=spec,
+            current=existing.get(args.report_name),
         )
         return
 
     # Multi-namespace: create one CaImageReport per namespace, with name
     # "<report-name>-<namespace>" (sanitized).
-    for ns, entries in ns_map.items():
+    def upsert_ns(ns: str, entries: List[Dict[str, Any]]) -> None:
         safe_ns = sanitize_ns(ns)
         cr_name = f"{args.report_name}-{safe_ns}"
         sys.stderr.write(
@@ -175,8 +222,17 @@ def main() -> None:
             name=cr_name,
             namespace=args.report_namespace,
             spec=spec,
+            current=existing.get(cr_name),
         )
 
+    # every namespace is attempted even if one fails; the first error is
+    # raised once all of them are done
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS) as ex:
+        futures = [ex.submit(upsert_ns, ns, entries) for ns, entries in ns_map.items()]
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        raise errors[0]
+
 
 if __name__ == "__main__":
     main()